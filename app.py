@@ -1,24 +1,27 @@
 import streamlit as st
 from app_modules.utils import (
-    init_storage, load_data, get_coordinates, save_data,
-    get_recipe_of_the_day, set_recipe_of_the_day
+    init_storage, load_data, start_geocoder,
+    get_recipe_of_the_day, set_recipe_of_the_day, search_dish_names
 )
 from app_modules.forms import recipe_form
-from app_modules.display import display_stats, show_recipes
-import pandas as pd
+from app_modules.display import (
+    display_stats, show_recipes, show_recipe_map, show_performance_panel
+)
+from app_modules.instrumentation import start_rerun, finish_rerun, section
 import random
 import time
 # Page configuration
 st.set_page_config(page_title="Roots & Recipes", page_icon="🍲", layout="centered")
 
-# Initialize storage and load data
-init_storage()
-df = load_data()
+# Per-rerun timing (shown in the admin debug panel)
+start_rerun()
 
-if 'rating_sum' not in df.columns:
-    df['rating_sum'] = 0
-if 'rating_count' not in df.columns:
-    df['rating_count'] = 0
+# Initialize storage and load data
+with section("render.load"):
+    init_storage()
+    # Fills in coordinates for new and older recipes off the request path
+    start_geocoder()
+    df = load_data()
 
 # App title and intro
 st.title("🍲 Roots & Recipes")
@@ -27,38 +30,48 @@ st.markdown("💡 You can type in your native language! Use [Google Input Tools]
 st.markdown("----")
 
 # Show Recipe of the Day if available
-recipe_of_the_day = get_recipe_of_the_day()
-if recipe_of_the_day:
-    st.markdown("""
-        <div style="
-            background-color: #f9f9f9;
-            border-left: 6px solid #FFA500;
-            padding: 1.2em;
-            border-radius: 8px;
-            margin-bottom: 1.5em;
-        ">
-            <h3 style="margin-top: 0">🌟 Recipe of the Day 🌟</h3>
-            <p><strong>Dish Name:</strong> {dish_name}</p>
-            <p><strong>Taste Description:</strong> {taste}</p>
-        </div>
-    """.format(
-        dish_name=recipe_of_the_day['dish_name'],
-        taste=recipe_of_the_day['taste_description']
-    ), unsafe_allow_html=True)
+with section("render.recipe_of_the_day"):
+    recipe_of_the_day = get_recipe_of_the_day()
+    if recipe_of_the_day:
+        st.markdown("""
+            <div style="
+                background-color: #f9f9f9;
+                border-left: 6px solid #FFA500;
+                padding: 1.2em;
+                border-radius: 8px;
+                margin-bottom: 1.5em;
+            ">
+                <h3 style="margin-top: 0">🌟 Recipe of the Day 🌟</h3>
+                <p><strong>Dish Name:</strong> {dish_name}</p>
+                {taste}
+            </div>
+        """.format(
+            dish_name=recipe_of_the_day['dish_name'],
+            # Automatic picks have no admin-written description
+            taste=(f"<p><strong>Taste Description:</strong> {recipe_of_the_day['taste_description']}</p>"
+                   if recipe_of_the_day['taste_description'] else "")
+        ), unsafe_allow_html=True)
 
 # Admin section to set Recipe of the Day
-with st.expander("🔧 Admin: Set Recipe of the Day"):
+with section("render.admin"), st.expander("🔧 Admin: Set Recipe of the Day"):
     password = st.text_input("Enter admin password to set Recipe of the Day", type="password")
     if password == "admin123":
-        recipe_options = df[["id", "dish_name"]].apply(
-            lambda row: f"{row['dish_name']} (ID: {row['id']})", axis=1).tolist()
-        selected = st.selectbox("Select a Recipe", options=recipe_options)
+        # Only the top matches are sent to the browser, whatever the catalog size
+        dish_query = st.text_input("Search recipes by dish name")
+        recipe_options = search_dish_names(dish_query)
+        selected = st.selectbox(
+            "Select a Recipe", options=recipe_options,
+            format_func=lambda option: f"{option[1]} (ID: {option[0]})"
+        )
         taste_description = st.text_area("Describe how it tastes")
 
-        if st.button("Set Recipe of the Day"):
-            recipe_id = int(selected.split("ID: ")[1].strip(")"))
+        if selected is None:
+            st.info("No recipes match that name.")
+        elif st.button("Set Recipe of the Day"):
+            recipe_id, dish_name = selected
             set_recipe_of_the_day(recipe_id, taste_description)
-            st.success(f"Recipe of the Day updated to '{selected.split(' (ID')[0]}'!")
+            st.success(f"Recipe of the Day updated to '{dish_name}'!")
+        st.checkbox("Show performance breakdown", key="show_perf_panel")
     elif password:
         st.error("Incorrect password")
 
@@ -66,33 +79,24 @@ with st.expander("🔧 Admin: Set Recipe of the Day"):
 df = recipe_form(df)
 
 # Stats
-display_stats(df)
+display_stats()
 
 # Map Integration
-st.markdown("## 🗺️ Recipe Map (Country of Origin)")
-
-if "country" in df.columns:
-    if "latitude" not in df.columns or "longitude" not in df.columns or df["latitude"].isnull().all():
-        coords = df["country"].apply(lambda c: get_coordinates(c) if c else (None, None))
-        valid_coords = coords.apply(lambda x: x if isinstance(x, tuple) and len(x) == 2 else (None, None))
+with section("render.map"):
+    st.markdown("## 🗺️ Recipe Map (Country of Origin)")
 
-        if len(valid_coords) > 0:
-            df["latitude"], df["longitude"] = zip(*valid_coords)
-        else:
-            df["latitude"], df["longitude"] = pd.Series(dtype=float), pd.Series(dtype=float)
-
-        save_data(df)
-
-    map_df = df.dropna(subset=["latitude", "longitude"])
-    if not map_df.empty:
-        st.map(map_df[["latitude", "longitude"]])
+    if "country" in df.columns:
+        # Per-location counts, not one point per recipe
+        show_recipe_map()
     else:
-        st.info("No valid location data available yet.")
-else:
-    st.warning("🌍 Country field is missing from the data.")
+        st.warning("🌍 Country field is missing from the data.")
 
 # Search and filter + Show recipes with comments
 show_recipes(df)
 st.markdown("---")
 st.caption("Made with ❤️ using Streamlit")
 
+report = finish_rerun()
+if st.session_state.get("show_perf_panel"):
+    show_performance_panel(report)
+
@@ -0,0 +1,310 @@
+"""Read-only JSON API over the storage layer, run next to the Streamlit app.
+
+    python -m app_modules.api [--host 127.0.0.1] [--port 8601] [--db data/recipes.db]
+
+Endpoints (GET and HEAD):
+
+    /api/recipes?sort=recent|alpha&limit=20&cursor=...&q=...
+    /api/recipes/<id>
+    /api/recipes/<id>/comments?limit=50
+    /api/ratings?ids=1,2,3
+    /api/top-rated?k=10&score=bayes|avg&category=&country=&language=
+    /api/recipe-of-the-day
+    /api/stats
+
+Every response carries an ETag built from the ``db_meta`` write counters (the
+Recipe of the Day also folds in the date) and a Last-Modified from the time
+the newest counter moved. Last-Modified is left out while that time is still
+in the current second, since a later write in the same second would share it.
+A conditional request whose validators still match gets a 304 without running
+the endpoint, and the counters themselves are re-read at most once per
+``VERSION_CHECK_INTERVAL``, so repeat reads cost no query.
+"""
+import argparse
+import base64
+import datetime
+import json
+import re
+import threading
+import time
+import traceback
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from app_modules import db, featured, utils
+from app_modules.dataset import VERSION_CHECK_INTERVAL
+
+DEFAULT_PORT = 8601
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+SORTS = {"recent": "Most Recent", "alpha": "Alphabetical"}
+
+_versions = {"checked_at": 0.0, "db_file": None, "tag": None}
+_versions_lock = threading.Lock()
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _write_version():
+    """``(etag base, last-modified epoch seconds)``, refreshed at most once per interval."""
+    with _versions_lock:
+        now = time.monotonic()
+        if _versions["db_file"] == db.DB_FILE and now - _versions["checked_at"] < VERSION_CHECK_INTERVAL:
+            return _versions["tag"], _versions["modified"]
+        with db.connection() as conn:
+            counters = conn.execute("SELECT value, changed_at FROM db_meta ORDER BY key").fetchall()
+        changed_at = [changed for _, changed in counters if changed is not None]
+        modified = max(changed_at) / 1000 if changed_at else time.time()
+        tag = "v" + "-".join(str(value) for value, _ in counters)
+        if tag != _versions["tag"]:
+            # The Recipe of the Day cache is per process; another process may have set it
+            featured.invalidate()
+        _versions.update(checked_at=now, db_file=db.DB_FILE, tag=tag, modified=int(modified))
+        return _versions["tag"], _versions["modified"]
+
+
+def _records(df):
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _clean(value):
+    if isinstance(value, dict):
+        return {key: _clean(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(item) for item in value]
+    if hasattr(value, "item"):
+        # numpy scalars
+        value = value.item()
+    if isinstance(value, float) and pd.isna(value):
+        return None
+    return value
+
+
+def _int_param(query, name, default, low=1, high=None):
+    raw = query.get(name, [None])[0]
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an integer")
+    if value < low or (high is not None and value > high):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' must be between {low} and {high}")
+    return value
+
+
+def _encode_cursor(cursor):
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(raw):
+    if not raw:
+        return None
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)))
+    except (ValueError, TypeError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "invalid cursor")
+    # (sort key, id) as produced by _encode_cursor
+    if not (isinstance(cursor, list) and len(cursor) == 2 and isinstance(cursor[0], str)
+            and isinstance(cursor[1], int) and not isinstance(cursor[1], bool)):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "invalid cursor")
+    return tuple(cursor)
+
+
+# -----------------------------
+# Endpoints
+# -----------------------------
+def list_recipes(query):
+    sort = query.get("sort", ["recent"])[0]
+    if sort not in SORTS:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'sort' must be one of {', '.join(SORTS)}")
+    limit = _int_param(query, "limit", DEFAULT_PAGE_SIZE, high=MAX_PAGE_SIZE)
+    cursor = _decode_cursor(query.get("cursor", [None])[0])
+    search = query.get("q", [""])[0].strip()
+    page, next_cursor = utils.get_recipe_page(SORTS[sort], limit, cursor=cursor, search=search)
+    return {"recipes": _records(page), "next_cursor": _encode_cursor(next_cursor)}
+
+
+def recipe_detail(query, recipe_id):
+    recipe = utils.get_recipe(recipe_id)
+    if recipe is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "recipe not found")
+    recipe.pop("dedup_key", None)
+    recipe.pop("image_hash", None)
+    return {"recipe": recipe}
+
+
+def recipe_comments(query, recipe_id):
+    limit = _int_param(query, "limit", 50, high=1000)
+    comments = utils.get_comments_for_recipes([recipe_id], limit_per_recipe=limit)[recipe_id]
+    keys = ["commenter_name", "comment_text", "rating", "timestamp"]
+    return {"recipe_id": recipe_id, "comments": [dict(zip(keys, row)) for row in comments]}
+
+
+def ratings(query):
+    raw = query.get("ids", [""])[0]
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "'ids' must be a comma-separated list of integers")
+    if not ids or len(ids) > MAX_PAGE_SIZE:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'ids' must list 1 to {MAX_PAGE_SIZE} recipe ids")
+    return {"ratings": {str(key): value for key, value in utils.get_ratings(ids).items()}}
+
+
+def top_rated(query):
+    score = query.get("score", ["bayes"])[0]
+    if score not in ("bayes", "avg"):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "'score' must be 'bayes' or 'avg'")
+    groups = {
+        group: query[group][0] for group in ("category", "country", "language")
+        if query.get(group, [""])[0]
+    }
+    top = utils.get_top_rated(_int_param(query, "k", 10, high=MAX_PAGE_SIZE), score=score, **groups)
+    return {"recipes": _records(top)}
+
+
+def recipe_of_the_day(query):
+    return {"recipe_of_the_day": utils.get_recipe_of_the_day()}
+
+
+def stats(query):
+    return {"stats": utils.get_community_stats()}
+
+
+# (pattern, handler, ETag depends on the date)
+ROUTES = [
+    (re.compile(r"^/api/recipes/?$"), list_recipes, False),
+    (re.compile(r"^/api/recipes/(\d+)/?$"), recipe_detail, False),
+    (re.compile(r"^/api/recipes/(\d+)/comments/?$"), recipe_comments, False),
+    (re.compile(r"^/api/ratings/?$"), ratings, False),
+    (re.compile(r"^/api/top-rated/?$"), top_rated, False),
+    (re.compile(r"^/api/recipe-of-the-day/?$"), recipe_of_the_day, True),
+    (re.compile(r"^/api/stats/?$"), stats, False),
+]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "RootsAndRecipesAPI/1.0"
+    quiet = True
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _method_not_allowed(self):
+        self._send_json(HTTPStatus.METHOD_NOT_ALLOWED, {"error": "read-only API"},
+                        extra={"Allow": "GET, HEAD"})
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = _method_not_allowed
+
+    def _serve(self, send_body):
+        url = urlsplit(self.path)
+        for pattern, handler, dated in ROUTES:
+            match = pattern.match(url.path)
+            if match:
+                break
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "unknown endpoint"}, send_body=send_body)
+            return
+
+        tag, modified = _write_version()
+        if dated:
+            tag += "-" + datetime.date.today().isoformat()
+        etag = f'"{tag}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if modified < int(time.time()):
+            headers["Last-Modified"] = formatdate(modified, usegmt=True)
+        if self._not_modified(etag, modified):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            return
+
+        try:
+            payload = handler(parse_qs(url.query), *(int(group) for group in match.groups()))
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)}, send_body=send_body)
+            return
+        except Exception:
+            traceback.print_exc()
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"},
+                            send_body=send_body)
+            return
+        self._send_json(HTTPStatus.OK, payload, extra=headers, send_body=send_body)
+
+    def _not_modified(self, etag, modified):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [part.strip() for part in if_none_match.split(",")]
+            # Weak comparison: W/"x" matches "x" (str.removeprefix needs 3.9)
+            tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return modified <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send_json(self, status, payload, extra=None, send_body=True):
+        body = json.dumps(_clean(payload), ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (extra or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(host="127.0.0.1", port=DEFAULT_PORT, quiet=True):
+    """Build (but don't start) the API server; port 0 picks a free port."""
+    handler = type("Handler", (ApiHandler,), {"quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the read-only recipes JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", help=f"database file (default {db.DB_FILE})")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        db.set_db_file(args.db)
+    utils.init_storage()
+    server = make_server(args.host, args.port, quiet=not args.verbose)
+    print(f"🍲 Serving API on http://{args.host}:{server.server_address[1]}/api/recipes")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Bulk recipe import/export.
+
+    python -m app_modules.bulk import recipes.jsonl [--images-root DIR]
+    python -m app_modules.bulk import recipes.csv
+    python -m app_modules.bulk export backup.jsonl
+
+Imports stream the input, validate each record like the submission form,
+insert in large ``executemany`` transactions (duplicates are skipped by the
+dedup key), and geocode once per distinct country after the rows are in:
+countries known offline are filled in directly, the rest go through the
+rate-limited background geocoder.
+Exports stream rows by id with a bounded memory footprint.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+from app_modules import dataset, dedup, geocode_worker, geocoding, images, ingredient_index
+from app_modules.db import connection
+from app_modules.utils import get_timestamp, init_storage
+
+BATCH_SIZE = 5000
+EXPORT_FETCH = 1000
+MAX_REPORTED_ERRORS = 20
+
+IMPORT_COLUMNS = [
+    "name", "language", "dish_name", "category", "country", "ingredients",
+    "instructions", "story", "image_path", "thumb_path", "image_hash",
+    "timestamp", "dedup_key",
+]
+EXPORT_COLUMNS = [
+    "id", "name", "language", "dish_name", "category", "country", "ingredients",
+    "instructions", "story", "image_path", "thumb_path", "timestamp",
+    "latitude", "longitude",
+]
+REQUIRED = ["dish_name", "ingredients", "instructions"]
+
+
+def read_records(path):
+    """Yield (line_number, dict) from a .jsonl or .csv file."""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+        return
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, ValueError(f"invalid JSON: {e}")
+
+
+def validate(record):
+    """Return (entry, None) or (None, error message)."""
+    if isinstance(record, Exception):
+        return None, str(record)
+    if not isinstance(record, dict):
+        return None, "record is not an object"
+    not_text = [
+        key for key in IMPORT_COLUMNS
+        if record.get(key) is not None and not isinstance(record.get(key), str)
+    ]
+    if not_text:
+        return None, f"field(s) must be text: {', '.join(not_text)}"
+    entry = {}
+    for key in IMPORT_COLUMNS:
+        value = record.get(key)
+        entry[key] = value.strip() if isinstance(value, str) else value
+    missing = [key for key in REQUIRED if not entry.get(key)]
+    if missing:
+        return None, f"missing required field(s): {', '.join(missing)}"
+    entry["dish_name"] = entry["dish_name"].title()
+    entry["category"] = entry.get("category") or "Other"
+    entry["timestamp"] = entry.get("timestamp") or get_timestamp()
+    entry["dedup_key"] = dedup.recipe_key(entry.get("name"), entry["dish_name"])
+    return entry, None
+
+
+def _image_source(source, images_root):
+    """Where ``source`` is on disk: under ``images_root``, the working directory or IMAGE_DIR."""
+    if "\\" in source and os.sep != "\\":
+        # Rows created on Windows store backslash-separated paths
+        source = os.path.join(*source.split("\\"))
+    if os.path.isabs(source):
+        return source
+    candidates = [os.path.join(images_root, source), source, os.path.join(images.IMAGE_DIR, source)]
+    return next((path for path in candidates if os.path.exists(path)), candidates[0])
+
+
+def _copy_image(entry, source, images_root):
+    """Store the referenced image through the upload pipeline."""
+    # Exports reference files already in the store; reuse them as they are
+    stored = images.stored_variants(source)
+    if stored is None:
+        with open(_image_source(source, images_root), "rb") as f:
+            stored = images.store_image(f.read())
+    entry.update(stored)
+
+
+def _insert_batch(conn, batch):
+    before = conn.execute("SELECT COALESCE(MAX(id), 0) FROM recipes").fetchone()[0]
+    cursor = conn.executemany(f"""
+        INSERT INTO recipes ({", ".join(IMPORT_COLUMNS)})
+        VALUES ({", ".join("?" * len(IMPORT_COLUMNS))})
+        ON CONFLICT(dedup_key) DO NOTHING
+    """, [tuple(entry[col] for col in IMPORT_COLUMNS) for entry in batch])
+    for recipe_id, ingredients in conn.execute(
+        "SELECT id, ingredients FROM recipes WHERE id > ?", (before,)
+    ).fetchall():
+        dedup.index_recipe(conn, recipe_id, ingredients)
+        ingredient_index.index_recipe(conn, recipe_id, ingredients)
+    return cursor.rowcount
+
+
+def geocode_pending(countries):
+    """Fill rows for countries known offline; queue the rest for the geocode worker.
+
+    Returns (resolved, queued) country counts. Queued countries are looked up
+    at the worker's rate limit once it runs.
+    """
+    resolved = queued = 0
+    for country in sorted(countries):
+        coords = geocoding.lookup_cached(country)
+        if coords is None:
+            queued += geocode_worker.enqueue(country)
+            continue
+        lat, lon = coords
+        if lat is None:
+            continue
+        with connection() as conn:
+            conn.execute("""
+                UPDATE recipes SET latitude = ?, longitude = ?
+                WHERE country = ? AND latitude IS NULL
+            """, (lat, lon, country))
+        resolved += 1
+    return resolved, queued
+
+
+def import_recipes(path, images_root=None, batch_size=BATCH_SIZE, log=print):
+    """Import a JSONL/CSV file; returns a summary dict."""
+    images_root = images_root or os.path.dirname(os.path.abspath(path))
+    summary = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0, "countries": 0, "geocode_queued": 0}
+    countries = set()
+    batch = []
+
+    def flush():
+        with connection() as conn:
+            inserted = _insert_batch(conn, batch)
+        summary["inserted"] += inserted
+        summary["duplicates"] += len(batch) - inserted
+        batch.clear()
+
+    for line_number, record in read_records(path):
+        summary["read"] += 1
+        entry, error = validate(record)
+        if entry is not None and entry.get("image_path"):
+            try:
+                _copy_image(entry, entry["image_path"], images_root)
+            except OSError as e:
+                entry, error = None, f"image {entry['image_path']!r}: {e}"
+        if error:
+            summary["invalid"] += 1
+            if summary["invalid"] <= MAX_REPORTED_ERRORS:
+                log(f"⚠️ line {line_number}: {error}")
+            continue
+        if entry.get("country"):
+            countries.add(entry["country"])
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    summary["countries"], summary["geocode_queued"] = geocode_pending(countries)
+    dataset.invalidate()
+    return summary
+
+
+def iter_recipes(fetch_size=EXPORT_FETCH):
+    """Yield recipe dicts in id order without loading the table into memory."""
+    last_id = 0
+    query = f"""
+        SELECT {", ".join(EXPORT_COLUMNS)} FROM recipes
+        WHERE id > ? ORDER BY id LIMIT ?
+    """
+    while True:
+        with connection() as conn:
+            rows = conn.execute(query, (last_id, fetch_size)).fetchall()
+        if not rows:
+            return
+        for row in rows:
+            yield dict(zip(EXPORT_COLUMNS, row))
+        last_id = rows[-1][0]
+
+
+def export_recipes(out):
+    """Write every recipe as one JSON line to the file object ``out``."""
+    count = 0
+    for recipe in iter_recipes():
+        out.write(json.dumps(recipe, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export recipes.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="import recipes from .jsonl or .csv")
+    imp.add_argument("path")
+    imp.add_argument("--images-root",
+                     help="base directory for relative image paths (default: the input file's "
+                          "directory, then the working directory and the image store)")
+    imp.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    exp = sub.add_parser("export", help="export recipes as JSONL ('-' for stdout)")
+    exp.add_argument("path")
+    args = parser.parse_args(argv)
+
+    init_storage()
+    if args.command == "import":
+        summary = import_recipes(args.path, args.images_root, args.batch_size)
+        print("✅ " + ", ".join(f"{key}: {value}" for key, value in summary.items()))
+        if summary["geocode_queued"]:
+            print(f"⏳ Geocoding {summary['geocode_queued']} more country(ies) at the worker's rate limit...")
+            geocode_worker.start(run_backfill=False)
+            geocode_worker.wait_idle()
+            geocode_worker.stop()
+            print(f"✅ Filled coordinates for {geocode_worker.stats()['rows_updated']} recipe(s)")
+    elif args.path == "-":
+        export_recipes(sys.stdout)
+    else:
+        with open(args.path, "w", encoding="utf-8") as out:
+            count = export_recipes(out)
+        print(f"✅ Exported {count} recipe(s) to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Append-only CSV comment store (the fallback when SQLite is unavailable).
+
+Rows are appended to ``data/comments.csv`` instead of rewriting the file,
+and fsync'd in batches. Top-rated results are aggregated from the file in
+chunks, and ``migrate_to_sqlite`` imports the CSV into the ``comments``
+table once (rating summaries follow via the comments triggers):
+
+    python -m app_modules.comments_csv migrate
+"""
+import argparse
+import atexit
+import csv
+import os
+import threading
+import time
+
+import pandas as pd
+
+from app_modules import dataset
+from app_modules.db import connection
+
+COMMENTS_FILE = "data/comments.csv"
+FIELDS = ["recipe_id", "name", "comment", "rating"]
+
+FSYNC_EVERY = 32
+FSYNC_INTERVAL = 2.0
+CHUNK_SIZE = 50_000
+MIGRATION_BATCH = 10_000
+
+
+class CommentAppender:
+    """Appends comment rows to one CSV file, fsync'ing every N rows or T seconds."""
+
+    def __init__(self, path, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        needs_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        needs_newline = False
+        if not needs_header:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) not in (b"\n", b"\r")
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        if needs_header:
+            self._writer.writerow(FIELDS)
+        elif needs_newline:
+            self._file.write("\n")
+
+    def append(self, recipe_id, name, comment, rating):
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._writer.writerow([recipe_id, name, comment, rating])
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                if self._unsynced:
+                    self._sync()
+                self._file.close()
+                self._file = None
+
+
+_appenders = {}
+_appenders_lock = threading.Lock()
+
+
+def appender(path=None):
+    path = path or COMMENTS_FILE
+    with _appenders_lock:
+        if path not in _appenders:
+            _appenders[path] = CommentAppender(path)
+        return _appenders[path]
+
+
+@atexit.register
+def _close_appenders():
+    for app in list(_appenders.values()):
+        app.close()
+
+
+def top_rated(path=None, chunksize=CHUNK_SIZE):
+    """Average rating per recipe, best first, aggregated chunk by chunk."""
+    path = path or COMMENTS_FILE
+    if path in _appenders:
+        _appenders[path].flush()
+    totals = None
+    for chunk in pd.read_csv(path, usecols=["recipe_id", "rating"], chunksize=chunksize):
+        chunk["rating"] = pd.to_numeric(chunk["rating"], errors="coerce")
+        part = chunk.groupby("recipe_id")["rating"].agg(["sum", "count"])
+        totals = part if totals is None else totals.add(part, fill_value=0)
+    if totals is None:
+        return pd.DataFrame(columns=["recipe_id", "rating"])
+    totals = totals[totals["count"] > 0]
+    avg = (totals["sum"] / totals["count"]).rename("rating").reset_index()
+    return avg.sort_values(by="rating", ascending=False)
+
+
+def _parse_rating(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _import_batch(conn, batch):
+    """Insert one staged batch; returns (imported, orphaned)."""
+    conn.execute("DELETE FROM csv_comments")
+    conn.executemany("INSERT INTO csv_comments VALUES (?, ?, ?, ?)", batch)
+    orphaned = conn.execute("""
+        SELECT COUNT(*) FROM csv_comments
+        WHERE NOT EXISTS (SELECT 1 FROM recipes r WHERE r.id = csv_comments.recipe_id)
+    """).fetchone()[0]
+    imported = conn.execute("""
+        INSERT INTO comments (recipe_id, commenter_name, comment_text, rating, timestamp)
+        SELECT s.recipe_id, s.commenter_name, s.comment_text, s.rating, NULL
+        FROM csv_comments s
+        WHERE EXISTS (SELECT 1 FROM recipes r WHERE r.id = s.recipe_id)
+        AND NOT EXISTS (
+            SELECT 1 FROM comments c
+            WHERE c.recipe_id = s.recipe_id AND c.commenter_name IS s.commenter_name
+            AND c.comment_text IS s.comment_text AND c.rating IS s.rating
+        )
+    """).rowcount
+    return imported, orphaned
+
+
+def migrate_to_sqlite(path=None, batch_size=MIGRATION_BATCH):
+    """Import CSV comments into the comments table, skipping exact repeats.
+
+    Repeats are detected on (recipe_id, name, comment, rating), both within the
+    file and against comments already in the database, so re-running is safe.
+    Rows for a recipe id that isn't in the database would fail the foreign key,
+    so they are left out and counted. Returns (imported, skipped, orphaned).
+
+    Each batch is staged in a temp table and checked against the database in
+    SQL, so memory grows with the file's distinct rows, not the comments table.
+    """
+    path = path or COMMENTS_FILE
+    if path in _appenders:
+        _appenders[path].flush()
+
+    read = imported = skipped = orphaned = 0
+    with connection() as conn:
+        conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS csv_comments (
+                recipe_id INTEGER, commenter_name TEXT, comment_text TEXT, rating INTEGER
+            )
+        """)
+        # Dropped again below; only the repeat check needs it
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_comments_csv_import
+            ON comments(recipe_id, commenter_name, comment_text, rating)
+        """)
+        try:
+            seen = set()
+            batch = []
+
+            def flush():
+                nonlocal imported, orphaned
+                batch_imported, batch_orphaned = _import_batch(conn, batch)
+                imported += batch_imported
+                orphaned += batch_orphaned
+                batch.clear()
+
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        recipe_id = int(row["recipe_id"])
+                    except (TypeError, ValueError):
+                        skipped += 1
+                        continue
+                    record = (recipe_id, row.get("name"), row.get("comment"), _parse_rating(row.get("rating")))
+                    if record in seen:
+                        skipped += 1
+                        continue
+                    seen.add(record)
+                    read += 1
+                    batch.append(record)
+                    if len(batch) >= batch_size:
+                        flush()
+                        conn.commit()
+            if batch:
+                flush()
+        finally:
+            conn.execute("DROP INDEX IF EXISTS idx_comments_csv_import")
+            conn.execute("DROP TABLE IF EXISTS temp.csv_comments")
+    # Rows neither imported nor orphaned were already in the database
+    skipped += read - imported - orphaned
+    if imported:
+        dataset.invalidate()
+    return imported, skipped, orphaned
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSV comment store utilities.")
+    parser.add_argument("command", choices=["migrate", "top"])
+    parser.add_argument("--file", default=COMMENTS_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == "top":
+        print(top_rated(args.file).to_string(index=False))
+        return
+
+    from app_modules.utils import init_storage
+    init_storage()
+    imported, skipped, orphaned = migrate_to_sqlite(args.file)
+    print(f"✅ Imported {imported} comment(s), skipped {skipped} duplicate or invalid row(s)")
+    if orphaned:
+        print(f"⚠️ Skipped {orphaned} comment(s) for recipes that don't exist")
+
+
+if __name__ == "__main__":
+    main()
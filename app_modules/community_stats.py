@@ -0,0 +1,227 @@
+"""Trigger-maintained community counters for the stats header.
+
+- ``community_stats``: one row with totals (recipes, comments, ratings) and
+  distinct counts (languages, countries, contributors).
+- ``stats_breakdown``: recipes per language, country and contributor; a value
+  gaining its first recipe (or losing its last) moves the distinct count.
+- ``stats_daily``: recipes and comments per day, for time series.
+
+Triggers on ``recipes`` and ``comments`` keep all three current, so the stats
+header is a single-row read however large the catalog grows.
+"""
+import pandas as pd
+
+from app_modules.db import connection
+from app_modules.instrumentation import timed
+
+# dimension -> (recipes column, community_stats distinct-count column)
+DIMENSIONS = {
+    "language": ("language", "languages"),
+    "country": ("country", "countries"),
+    "contributor": ("name", "contributors"),
+}
+PERIODS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m"}
+
+SUMMARY_COLUMNS = ["recipes", "comments", "ratings", "languages", "countries", "contributors"]
+
+
+def _recipe_delta(ref, sign):
+    """Trigger body counting one recipe row in (sign=+) or out (sign=-)."""
+    body = [
+        f"UPDATE community_stats SET recipes = recipes {sign} 1 WHERE id = 1;",
+        _daily(ref, sign, "recipes"),
+    ]
+    for dimension, (column, _) in DIMENSIONS.items():
+        if sign == "+":
+            body.append(f"""
+                INSERT INTO stats_breakdown (dimension, value, recipe_count)
+                SELECT '{dimension}', {ref}.{column}, 1 WHERE {ref}.{column} IS NOT NULL
+                ON CONFLICT(dimension, value) DO UPDATE SET recipe_count = recipe_count + 1;
+            """)
+        else:
+            body.append(f"""
+                UPDATE stats_breakdown SET recipe_count = recipe_count - 1
+                WHERE dimension = '{dimension}' AND value = {ref}.{column};
+                DELETE FROM stats_breakdown
+                WHERE dimension = '{dimension}' AND value = {ref}.{column} AND recipe_count <= 0;
+            """)
+    return "\n".join(body)
+
+
+def _comment_delta(ref, sign):
+    return f"""
+        UPDATE community_stats SET
+            comments = comments {sign} 1,
+            ratings = ratings {sign} ({ref}.rating IS NOT NULL)
+        WHERE id = 1;
+        {_daily(ref, sign, "comments")}
+    """
+
+
+def _distinct_delta(ref, sign):
+    """Trigger body for a stats_breakdown value appearing (+) or vanishing (-)."""
+    counters = ",\n".join(
+        f"{counter} = {counter} {sign} ({ref}.dimension = '{dimension}')"
+        for dimension, (_, counter) in DIMENSIONS.items()
+    )
+    return f"UPDATE community_stats SET {counters} WHERE id = 1;"
+
+
+def _daily(ref, sign, column):
+    if sign == "+":
+        return f"""
+            INSERT INTO stats_daily (day, {column})
+            SELECT substr({ref}.timestamp, 1, 10), 1 WHERE {ref}.timestamp IS NOT NULL
+            ON CONFLICT(day) DO UPDATE SET {column} = {column} + 1;
+        """
+    return f"""
+        UPDATE stats_daily SET {column} = {column} - 1
+        WHERE day = substr({ref}.timestamp, 1, 10);
+        DELETE FROM stats_daily
+        WHERE day = substr({ref}.timestamp, 1, 10) AND recipes <= 0 AND comments <= 0;
+    """
+
+
+def _triggers():
+    return {
+        "stats_breakdown_ai": (
+            "AFTER INSERT ON stats_breakdown",
+            _distinct_delta("new", "+"),
+        ),
+        "stats_breakdown_ad": (
+            "AFTER DELETE ON stats_breakdown",
+            _distinct_delta("old", "-"),
+        ),
+        "stats_recipes_ai": ("AFTER INSERT ON recipes", _recipe_delta("new", "+")),
+        "stats_recipes_ad": ("AFTER DELETE ON recipes", _recipe_delta("old", "-")),
+        "stats_recipes_au": (
+            "AFTER UPDATE OF language, country, name, timestamp ON recipes",
+            _recipe_delta("old", "-") + _recipe_delta("new", "+"),
+        ),
+        "stats_comments_ai": ("AFTER INSERT ON comments", _comment_delta("new", "+")),
+        "stats_comments_ad": ("AFTER DELETE ON comments", _comment_delta("old", "-")),
+        "stats_comments_au": (
+            "AFTER UPDATE OF rating, timestamp ON comments",
+            _comment_delta("old", "-") + _comment_delta("new", "+"),
+        ),
+    }
+
+
+def init_schema(c):
+    table_exists = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'community_stats'"
+    ).fetchone()
+    c.execute(f"""
+        CREATE TABLE IF NOT EXISTS community_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            {", ".join(f"{col} INTEGER NOT NULL DEFAULT 0" for col in SUMMARY_COLUMNS)}
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS stats_breakdown (
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            recipe_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, value)
+        ) WITHOUT ROWID
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_stats_breakdown_count
+        ON stats_breakdown(dimension, recipe_count DESC)
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS stats_daily (
+            day TEXT PRIMARY KEY,
+            recipes INTEGER NOT NULL DEFAULT 0,
+            comments INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    c.execute("INSERT OR IGNORE INTO community_stats (id) VALUES (1)")
+
+    for name, (event, body) in _triggers().items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+    if not table_exists:
+        rebuild(c)
+
+
+def prune_empty_days(c):
+    """Replace the triggers with ones that drop days counted down to zero."""
+    for name, (event, body) in _triggers().items():
+        c.execute(f"DROP TRIGGER IF EXISTS {name}")
+        c.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+    c.execute("DELETE FROM stats_daily WHERE recipes <= 0 AND comments <= 0")
+
+
+def rebuild(c):
+    """Recompute every counter from recipes and comments (first run / repair)."""
+    c.execute("DELETE FROM stats_breakdown")
+    c.execute("DELETE FROM stats_daily")
+    for dimension, (column, _) in DIMENSIONS.items():
+        c.execute(f"""
+            INSERT INTO stats_breakdown (dimension, value, recipe_count)
+            SELECT '{dimension}', {column}, COUNT(*)
+            FROM recipes WHERE {column} IS NOT NULL
+            GROUP BY {column}
+        """)
+    c.execute("""
+        INSERT INTO stats_daily (day, recipes, comments)
+        SELECT day, SUM(recipes), SUM(comments) FROM (
+            SELECT substr(timestamp, 1, 10) AS day, 1 AS recipes, 0 AS comments
+            FROM recipes WHERE timestamp IS NOT NULL
+            UNION ALL
+            SELECT substr(timestamp, 1, 10), 0, 1
+            FROM comments WHERE timestamp IS NOT NULL
+        )
+        GROUP BY day
+    """)
+    # Written last: the breakdown inserts above also bump the distinct counts
+    distinct = ",\n".join(
+        f"(SELECT COUNT(*) FROM stats_breakdown WHERE dimension = '{dimension}')"
+        for dimension in DIMENSIONS
+    )
+    c.execute(f"""
+        INSERT OR REPLACE INTO community_stats (id, {", ".join(SUMMARY_COLUMNS)})
+        SELECT 1,
+            (SELECT COUNT(*) FROM recipes),
+            (SELECT COUNT(*) FROM comments),
+            (SELECT COUNT(rating) FROM comments),
+            {distinct}
+    """)
+
+
+@timed()
+def summary():
+    """Totals and distinct counts as a dict (one row read)."""
+    with connection() as conn:
+        row = conn.execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM community_stats WHERE id = 1"
+        ).fetchone()
+    return dict(zip(SUMMARY_COLUMNS, row or [0] * len(SUMMARY_COLUMNS)))
+
+
+@timed()
+def breakdown(dimension, limit=10):
+    """Top ``limit`` values of ``dimension`` by recipe count."""
+    with connection() as conn:
+        return pd.read_sql_query("""
+            SELECT value, recipe_count
+            FROM stats_breakdown
+            WHERE dimension = ?
+            ORDER BY recipe_count DESC
+            LIMIT ?
+        """, conn, params=[dimension, limit]).rename(columns={"value": dimension})
+
+
+@timed()
+def time_series(period="week", since=None):
+    """Recipes and comments per ``period`` ("day", "week" or "month")."""
+    bucket = f"strftime('{PERIODS[period]}', day)"
+    with connection() as conn:
+        return pd.read_sql_query(f"""
+            SELECT {bucket} AS period, SUM(recipes) AS recipes, SUM(comments) AS comments
+            FROM stats_daily
+            WHERE day >= COALESCE(?, '') AND {bucket} IS NOT NULL
+            GROUP BY 1
+            ORDER BY 1
+        """, conn, params=[since])
@@ -0,0 +1,292 @@
+"""Process-wide cache of the recipes DataFrame, keyed by DB write versions.
+
+Triggers bump counters in ``db_meta`` on every change, so a rerun only has
+to read one small table to know whether its cached frame is still current:
+
+- ``recipes_version`` moves on any recipes change; if only this moved, the
+  new rows are appended by loading ``id > last seen id``.
+- ``recipes_rewrite_version`` moves on UPDATE/DELETE and forces a full reload.
+- ``coordinates_version`` moves when the geocoder fills in coordinates for a
+  recipe that had none; only those rows' latitude/longitude are re-read.
+  Changing coordinates that were already set counts as a rewrite.
+- ``ratings_version`` moves when the rating aggregate changes; only the narrow
+  ratings table is re-read and re-joined.
+
+Each counter row also records ``changed_at`` (ms since the epoch) when it last
+moved, which the JSON API uses for Last-Modified.
+
+The cached frame is a slim catalog: short columns only, with categorical
+dtypes for the low-cardinality ones. The heavy free text (ingredients,
+instructions, story) is fetched per recipe by ``get_details`` and kept in a
+bounded LRU that is dropped whenever recipes are rewritten.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from app_modules import db
+from app_modules.db import connection
+
+VERSION_KEYS = ["recipes_version", "recipes_rewrite_version", "ratings_version", "coordinates_version"]
+# Writes from other processes (bulk import, API) become visible within this window
+VERSION_CHECK_INTERVAL = 1.0
+
+RATING_COLUMNS = ["rating_sum", "rating_count", "avg_rating"]
+
+CATALOG_COLUMNS = [
+    "id", "name", "language", "dish_name", "category", "country", "timestamp",
+    "latitude", "longitude",
+]
+CATEGORICAL_COLUMNS = ["category", "country", "language"]
+DETAIL_COLUMNS = ["ingredients", "instructions", "story", "image_path", "thumb_path"]
+DETAIL_CACHE_SIZE = 512
+# Every recipes column except id and the coordinates
+REWRITE_COLUMNS = [
+    "name", "language", "dish_name", "category", "country", "ingredients",
+    "instructions", "story", "image_path", "thumb_path", "image_hash", "timestamp",
+    "dedup_key",
+]
+
+CATALOG_SQL = f"SELECT {', '.join(CATALOG_COLUMNS)} FROM recipes"
+NOW_MS_SQL = "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+
+_cache = {}
+_lock = threading.Lock()
+_details = OrderedDict()
+_details_lock = threading.Lock()
+_details_version = {}
+_stats = {"full_loads": 0, "delta_loads": 0, "ratings_loads": 0, "coordinate_loads": 0,
+          "hits": 0, "detail_hits": 0, "detail_misses": 0}
+
+
+def init_schema(c):
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS db_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    c.executemany(
+        "INSERT OR IGNORE INTO db_meta (key, value) VALUES (?, 0)",
+        [(key,) for key in VERSION_KEYS],
+    )
+    track_changed_at(c)
+
+    triggers = [
+        ("recipes_version_ai", "AFTER INSERT ON recipes", _bump("recipes_version")),
+        ("recipes_version_ad", "AFTER DELETE ON recipes",
+         _bump("recipes_version", "recipes_rewrite_version")),
+        ("ratings_version_ai", "AFTER INSERT ON recipe_ratings", _bump("ratings_version")),
+        ("ratings_version_au", "AFTER UPDATE ON recipe_ratings", _bump("ratings_version")),
+        ("ratings_version_ad", "AFTER DELETE ON recipe_ratings", _bump("ratings_version")),
+    ]
+    for name, event, body in triggers:
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+    track_coordinates(c)
+
+
+def _bump(*keys):
+    return "\n".join(
+        f"UPDATE db_meta SET value = value + 1 WHERE key = '{key}';" for key in keys
+    )
+
+
+def track_coordinates(c):
+    """Count coordinate fill-ins separately so they don't force a full reload."""
+    c.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES ('coordinates_version', 0)")
+    # Earlier schemas bumped the rewrite version on any UPDATE
+    c.execute("DROP TRIGGER IF EXISTS recipes_version_au")
+    unlocated = "old.latitude IS NULL OR old.longitude IS NULL"
+    triggers = [
+        ("recipes_rewrite_au", f"AFTER UPDATE OF {', '.join(REWRITE_COLUMNS)} ON recipes",
+         _bump("recipes_version", "recipes_rewrite_version")),
+        ("recipes_located_au", f"AFTER UPDATE OF latitude, longitude ON recipes WHEN {unlocated}",
+         _bump("coordinates_version")),
+        ("recipes_relocated_au",
+         f"AFTER UPDATE OF latitude, longitude ON recipes WHEN NOT ({unlocated})",
+         _bump("recipes_version", "recipes_rewrite_version")),
+    ]
+    for name, event, body in triggers:
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+
+def track_changed_at(c):
+    """Add ``db_meta.changed_at`` and the trigger that stamps it when a counter moves."""
+    c.execute("PRAGMA table_info(db_meta)")
+    if "changed_at" not in [col[1] for col in c.fetchall()]:
+        c.execute("ALTER TABLE db_meta ADD COLUMN changed_at INTEGER")
+        c.execute(f"UPDATE db_meta SET changed_at = {NOW_MS_SQL}")
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS db_meta_changed_at
+        AFTER UPDATE OF value ON db_meta BEGIN
+            UPDATE db_meta SET changed_at = {NOW_MS_SQL} WHERE key = new.key;
+        END
+    """)
+
+
+def read_versions(conn, keys=VERSION_KEYS):
+    rows = dict(conn.execute("SELECT key, value FROM db_meta").fetchall())
+    return {key: rows.get(key, 0) for key in keys}
+
+
+def invalidate(full=False):
+    """Force the next load to re-check versions (or drop the cache entirely)."""
+    with _lock:
+        if full:
+            _cache.pop(db.DB_FILE, None)
+        elif db.DB_FILE in _cache:
+            _cache[db.DB_FILE]["checked_at"] = 0.0
+    if full:
+        with _details_lock:
+            _details.clear()
+
+
+def stats():
+    return dict(_stats)
+
+
+def _load_ratings(conn):
+    _stats["ratings_loads"] += 1
+    return pd.read_sql_query(
+        "SELECT recipe_id AS id, rating_sum, rating_count, avg_rating FROM recipe_ratings",
+        conn,
+    )
+
+
+def _slim(recipes):
+    recipes = recipes.copy()
+    for column in CATEGORICAL_COLUMNS:
+        recipes[column] = recipes[column].astype("category")
+    return recipes
+
+
+def _join(recipes, ratings):
+    frame = recipes.merge(ratings, on="id", how="left")
+    frame["rating_sum"] = frame["rating_sum"].fillna(0).astype(int)
+    frame["rating_count"] = frame["rating_count"].fillna(0).astype(int)
+    return frame
+
+
+def _patch_coordinates(conn, recipes):
+    """Re-read latitude/longitude for cached rows that had none."""
+    unlocated = recipes["latitude"].isna() | recipes["longitude"].isna()
+    if not unlocated.any():
+        return recipes
+    _stats["coordinate_loads"] += 1
+    located = pd.read_sql_query("""
+        SELECT id, latitude, longitude FROM recipes
+        WHERE id IN (SELECT value FROM json_each(?)) AND latitude IS NOT NULL
+    """, conn, params=[json.dumps(recipes.loc[unlocated, "id"].astype(int).tolist())])
+    if located.empty:
+        return recipes
+    recipes = recipes.copy()
+    rows = recipes["id"].isin(located["id"])
+    coords = located.set_index("id").reindex(recipes.loc[rows, "id"])
+    for column in ("latitude", "longitude"):
+        # A column that was all NULL loads as object dtype
+        recipes[column] = recipes[column].astype(float)
+        recipes.loc[rows, column] = coords[column].to_numpy()
+    return recipes
+
+
+def _refresh(entry):
+    with connection() as conn:
+        versions = read_versions(conn)
+        if entry is not None and versions == entry["versions"]:
+            return entry
+
+        if entry is None or versions["recipes_rewrite_version"] != entry["versions"]["recipes_rewrite_version"]:
+            _stats["full_loads"] += 1
+            recipes = _slim(pd.read_sql_query(CATALOG_SQL + " ORDER BY id", conn))
+            ratings = _load_ratings(conn)
+        else:
+            recipes, ratings = entry["recipes"], entry["ratings"]
+            if versions["recipes_version"] != entry["versions"]["recipes_version"]:
+                _stats["delta_loads"] += 1
+                new_rows = pd.read_sql_query(
+                    CATALOG_SQL + " WHERE id > ? ORDER BY id", conn,
+                    params=[entry["max_id"]],
+                )
+                if recipes.empty:
+                    recipes = _slim(new_rows)
+                elif not new_rows.empty:
+                    # Categories differ between the frames; re-derive them
+                    recipes = _slim(pd.concat(
+                        [recipes.astype({c: object for c in CATEGORICAL_COLUMNS}), new_rows],
+                        ignore_index=True,
+                    ))
+            if versions["coordinates_version"] != entry["versions"]["coordinates_version"]:
+                recipes = _patch_coordinates(conn, recipes)
+            if versions["ratings_version"] != entry["versions"]["ratings_version"]:
+                ratings = _load_ratings(conn)
+
+    return {
+        "versions": versions,
+        "recipes": recipes,
+        "ratings": ratings,
+        "frame": _join(recipes, ratings),
+        "max_id": int(recipes["id"].max()) if not recipes.empty else 0,
+    }
+
+
+def load_recipes():
+    """Return the recipes DataFrame with rating columns, from cache when current."""
+    with _lock:
+        entry = _cache.get(db.DB_FILE)
+        now = time.monotonic()
+        if entry is not None and now - entry["checked_at"] < VERSION_CHECK_INTERVAL:
+            _stats["hits"] += 1
+        else:
+            refreshed = _refresh(entry)
+            if refreshed is entry:
+                _stats["hits"] += 1
+            entry = refreshed
+            entry["checked_at"] = now
+            _cache[db.DB_FILE] = entry
+        return entry["frame"].copy()
+
+
+def get_details(recipe_ids):
+    """Return ``{id: {ingredients, instructions, story, image_path, thumb_path}}``.
+
+    Cached ids are served from the LRU; the rest come back in one query.
+    Unknown ids are left out of the result.
+    """
+    ids = [int(i) for i in recipe_ids]
+    entry = _cache.get(db.DB_FILE)
+    version = entry["versions"]["recipes_rewrite_version"] if entry else None
+    found, missing = {}, []
+    with _details_lock:
+        if _details_version.get(db.DB_FILE) != version:
+            # Recipes were edited or deleted since these were cached
+            for key in [key for key in _details if key[0] == db.DB_FILE]:
+                del _details[key]
+            _details_version[db.DB_FILE] = version
+        for recipe_id in ids:
+            key = (db.DB_FILE, recipe_id)
+            if key in _details:
+                _details.move_to_end(key)
+                found[recipe_id] = _details[key]
+            else:
+                missing.append(recipe_id)
+    _stats["detail_hits"] += len(found)
+    _stats["detail_misses"] += len(missing)
+    if not missing:
+        return found
+
+    with connection() as conn:
+        rows = conn.execute(f"""
+            SELECT id, {", ".join(DETAIL_COLUMNS)} FROM recipes
+            WHERE id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(missing),)).fetchall()
+    with _details_lock:
+        for row in rows:
+            detail = dict(zip(DETAIL_COLUMNS, row[1:]))
+            found[row[0]] = detail
+            _details[(db.DB_FILE, row[0])] = detail
+        while len(_details) > DETAIL_CACHE_SIZE:
+            _details.popitem(last=False)
+    return found
@@ -0,0 +1,163 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from app_modules import instrumentation
+
+DB_FILE = "data/recipes.db"
+
+POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 16384
+MMAP_SIZE = 64 * 1024 * 1024
+CACHED_STATEMENTS = 256
+
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+_pool_lock = threading.Lock()
+_pool_db_file = None
+_local = threading.local()
+_migrated = set()
+_migrate_lock = threading.Lock()
+
+
+def _open_connection(db_file):
+    directory = os.path.dirname(db_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # check_same_thread=False lets a pooled connection move between Streamlit
+    # script threads; the pool guarantees only one thread holds it at a time.
+    conn = sqlite3.connect(
+        db_file,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=CACHED_STATEMENTS,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    # Enforced on every connection: rows pointing at a missing recipe (e.g.
+    # comments for a deleted or never-imported id) now fail with IntegrityError
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def _acquire():
+    global _pool_db_file
+    with _pool_lock:
+        if _pool_db_file != DB_FILE:
+            # DB_FILE was repointed (tests, benchmarks): drop stale connections.
+            _drain_pool()
+            _pool_db_file = DB_FILE
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        return _open_connection(DB_FILE)
+
+
+def _release(conn):
+    if _pool_db_file != DB_FILE:
+        conn.close()
+        return
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+def _drain_pool():
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
+
+
+def close_all():
+    """Close every idle pooled connection."""
+    with _pool_lock:
+        _drain_pool()
+
+
+def set_db_file(db_file):
+    """Point the connection layer at another database file."""
+    global DB_FILE
+    DB_FILE = db_file
+    close_all()
+    with _migrate_lock:
+        # The file may have been replaced; check its user_version again
+        _migrated.discard(db_file)
+
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection for the current thread.
+
+    Nested uses on the same thread share one connection; the outermost block
+    commits on success and rolls back on error.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        _local.depth += 1
+        try:
+            yield conn
+        finally:
+            _local.depth -= 1
+        return
+
+    conn = _acquire()
+    # Expanding every statement to text costs time, so only trace while a
+    # rerun report is collecting (see instrumentation.start_rerun)
+    conn.set_trace_callback(
+        instrumentation.on_statement if instrumentation.current() is not None else None
+    )
+    _local.conn = conn
+    _local.depth = 1
+    try:
+        yield conn
+        if conn.in_transaction:
+            conn.commit()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        _local.conn = None
+        _local.depth = 0
+        _release(conn)
+
+
+def is_migrated():
+    """Whether ``migrate`` already checked the current database in this process."""
+    return DB_FILE in _migrated
+
+
+def migrate(migrations):
+    """Apply ``migrations`` newer than the database's ``PRAGMA user_version``.
+
+    ``migrations[n]`` takes a cursor and moves the schema from version n to
+    n + 1; all pending ones run in a single transaction. Each database file
+    is checked once per process, so later calls return straight away.
+    Returns the number of migrations applied.
+    """
+    with _migrate_lock:
+        if DB_FILE in _migrated:
+            return 0
+        with connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            applied = 0
+            if version < len(migrations):
+                if not conn.in_transaction:
+                    conn.execute("BEGIN IMMEDIATE")
+                # Another process may have migrated while we waited for the lock
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                for migration in migrations[version:]:
+                    migration(conn.cursor())
+                    applied += 1
+                conn.execute(f"PRAGMA user_version = {max(version, len(migrations))}")
+        _migrated.add(DB_FILE)
+        return applied
@@ -0,0 +1,183 @@
+"""Duplicate and near-duplicate recipe detection backed by indexes.
+
+Exact duplicates share a ``dedup_key`` (normalized contributor + dish name)
+guarded by a unique index on ``recipes``. Near duplicates are found with
+MinHash signatures over ingredient words, bucketed by LSH bands in
+``recipe_minhash`` so a lookup only touches recipes sharing a band.
+"""
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+NEAR_DUPLICATE_THRESHOLD = 0.6
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1753633273)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+# Quantities and units carry no identity: "2 cups rice" and "rice" match
+STOP_WORDS = {
+    "cup", "cups", "tbsp", "tsp", "tablespoon", "tablespoons", "teaspoon",
+    "teaspoons", "g", "gm", "gms", "gram", "grams", "kg", "ml", "l", "litre",
+    "liter", "pinch", "handful", "to", "taste", "as", "needed", "and", "or",
+    "of", "a", "few", "some", "small", "medium", "large", "chopped", "sliced",
+    "piece", "pieces", "nos", "inch",
+}
+
+
+def normalize_text(text):
+    """NFKC-normalize, casefold and collapse whitespace."""
+    if not text or not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def recipe_key(name, dish_name):
+    """Key shared by submissions of the same dish by the same contributor."""
+    name, dish_name = normalize_text(name), normalize_text(dish_name)
+    if not name or not dish_name:
+        return None
+    return f"{name}\x1f{dish_name}"
+
+
+def ingredient_tokens(ingredients):
+    words = re.findall(r"[^\W\d_]+", normalize_text(ingredients))
+    return {word for word in words if word not in STOP_WORDS and len(word) > 1}
+
+
+def _token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def signature(ingredients):
+    """MinHash signature (NUM_PERM ints) of the ingredient words, or None."""
+    tokens = ingredient_tokens(ingredients)
+    if not tokens:
+        return None
+    hashes = [_token_hash(token) for token in tokens]
+    return [
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_buckets(sig):
+    buckets = []
+    for band in range(BANDS):
+        chunk = sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS_PER_BAND}Q", *chunk), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def _pack(sig):
+    return struct.pack(f"<{NUM_PERM}Q", *sig)
+
+
+def _unpack(blob):
+    return struct.unpack(f"<{NUM_PERM}Q", blob)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def init_schema(c):
+    """Unique dedup-key index plus MinHash tables, backfilled on first run."""
+    key_indexed = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_recipes_dedup_key'"
+    ).fetchone()
+    if not key_indexed:
+        seen = set()
+        updates = []
+        for recipe_id, name, dish_name in c.execute(
+            "SELECT id, name, dish_name FROM recipes ORDER BY id"
+        ).fetchall():
+            key = recipe_key(name, dish_name)
+            # Earlier submissions keep the key; historical repeats stay NULL
+            if key is not None and key not in seen:
+                seen.add(key)
+                updates.append((key, recipe_id))
+        c.executemany("UPDATE recipes SET dedup_key = ? WHERE id = ?", updates)
+        c.execute("CREATE UNIQUE INDEX idx_recipes_dedup_key ON recipes(dedup_key)")
+
+    signatures_exist = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipe_signatures'"
+    ).fetchone()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS recipe_signatures (
+            recipe_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL,
+            FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS recipe_minhash (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            recipe_id INTEGER NOT NULL,
+            PRIMARY KEY (band, bucket, recipe_id)
+        ) WITHOUT ROWID
+    """)
+    c.execute("""
+        CREATE TRIGGER IF NOT EXISTS recipe_minhash_ad AFTER DELETE ON recipes BEGIN
+            DELETE FROM recipe_minhash WHERE recipe_id = old.id;
+            DELETE FROM recipe_signatures WHERE recipe_id = old.id;
+        END
+    """)
+    if not signatures_exist:
+        for recipe_id, ingredients in c.execute(
+            "SELECT id, ingredients FROM recipes"
+        ).fetchall():
+            index_recipe(c, recipe_id, ingredients)
+
+
+def index_recipe(c, recipe_id, ingredients):
+    """Store the ingredient signature and LSH buckets for one recipe."""
+    sig = signature(ingredients)
+    if sig is None:
+        return
+    c.execute(
+        "INSERT OR REPLACE INTO recipe_signatures (recipe_id, signature) VALUES (?, ?)",
+        (recipe_id, _pack(sig)),
+    )
+    c.executemany(
+        "INSERT OR IGNORE INTO recipe_minhash (band, bucket, recipe_id) VALUES (?, ?, ?)",
+        [(band, bucket, recipe_id) for band, bucket in band_buckets(sig)],
+    )
+
+
+def find_near_duplicates(c, ingredients, threshold=NEAR_DUPLICATE_THRESHOLD, exclude_id=None):
+    """Return [(recipe_id, similarity)] of recipes with similar ingredients."""
+    sig = signature(ingredients)
+    if sig is None:
+        return []
+    buckets = band_buckets(sig)
+    placeholders = " OR ".join(["(band = ? AND bucket = ?)"] * len(buckets))
+    params = [value for pair in buckets for value in pair]
+    rows = c.execute(f"""
+        SELECT s.recipe_id, s.signature
+        FROM recipe_signatures s
+        WHERE s.recipe_id IN (
+            SELECT recipe_id FROM recipe_minhash WHERE {placeholders}
+        )
+    """, params).fetchall()
+
+    matches = []
+    for recipe_id, blob in rows:
+        if recipe_id == exclude_id:
+            continue
+        score = similarity(sig, _unpack(blob))
+        if score >= threshold:
+            matches.append((recipe_id, score))
+    return sorted(matches, key=lambda match: match[1], reverse=True)
@@ -1,20 +1,75 @@
 import streamlit as st
 import os
 import pandas as pd
-from app_modules.utils import get_comments, get_recipe_of_the_day
+import pydeck as pdk
+from app_modules.utils import (
+    find_recipes_with_ingredients, get_activity, get_comments_for_recipes,
+    get_community_stats, get_map_locations, get_recipe_of_the_day, get_stats_breakdown,
+    match_pantry,
+    get_recipe_page, get_recipes_by_ids, get_recipe_detail, get_top_rated
+)
+from app_modules.recipe_map import marker_radius
+from app_modules.search import search_recipe_ids
+from app_modules.instrumentation import timed
 
-def display_stats(df):
+COMMENTS_PER_RECIPE = 20
+TOP_RATED_COUNT = 5
+PAGE_SIZES = [10, 25, 50]
+MAP_GROUPING = {"Country": None, "Region (5°)": 5, "Continent (20°)": 20}
+PANTRY_RESULTS = 10
+PANTRY_MODES = ["Recipes I can make", "Recipes with all of these"]
+
+@timed("render.stats", rows=False)
+def display_stats():
     st.subheader("📊 Community Recipe Stats")
 
-    total = len(df)
-    languages = df["language"].nunique() if "language" in df.columns else 0
-    contributors = df["name"].nunique() if "name" in df.columns else 0
+    stats = get_community_stats()
+    st.markdown(f"- 🧾 **Total Recipes:** {stats['recipes']}")
+    st.markdown(f"- 🗣️ **Languages Represented:** {stats['languages']}")
+    st.markdown(f"- 🌍 **Countries:** {stats['countries']}")
+    st.markdown(f"- 👥 **Contributors:** {stats['contributors']}")
+    st.markdown(f"- 💬 **Comments:** {stats['comments']} ({stats['ratings']} ratings)")
 
-    st.markdown(f"- 🧾 **Total Recipes:** {total}")
-    st.markdown(f"- 🗣️ **Languages Represented:** {languages}")
-    st.markdown(f"- 👥 **Contributors:** {contributors}")
+    if stats["recipes"]:
+        with st.expander("📈 Community activity"):
+            activity = get_activity("week")
+            if not activity.empty:
+                st.caption("Recipes and comments per week")
+                st.bar_chart(activity.set_index("period")[["recipes", "comments"]])
+            col1, col2 = st.columns(2)
+            with col1:
+                st.dataframe(get_stats_breakdown("language", 5), hide_index=True)
+            with col2:
+                st.dataframe(get_stats_breakdown("country", 5), hide_index=True)
     st.markdown("----")
 
+@timed("render.map_markers", rows=False)
+def show_recipe_map():
+    grouping = st.selectbox("Group markers by", list(MAP_GROUPING))
+    points = get_map_locations(MAP_GROUPING[grouping])
+    if points.empty:
+        st.info("No valid location data available yet.")
+        return
+
+    points["radius"] = marker_radius(points["recipe_count"])
+    points["dishes"] = points["dishes"].fillna("")
+    layer = pdk.Layer(
+        "ScatterplotLayer",
+        data=points,
+        get_position=["longitude", "latitude"],
+        get_radius="radius",
+        get_fill_color=[255, 140, 0, 160],
+        pickable=True,
+    )
+    st.pydeck_chart(pdk.Deck(
+        layers=[layer],
+        initial_view_state=pdk.ViewState(latitude=20, longitude=0, zoom=0.8),
+        tooltip={"text": "{country}\n{recipe_count} recipes\n{dishes}"},
+        map_style=None,
+    ))
+    st.caption(f"📍 {len(points)} locations · {int(points['recipe_count'].sum())} recipes")
+
+@timed("render.show_recipes", rows=False)
 def show_recipes(df):
     st.header("🍽️ Explore Regional Recipes")
 
@@ -24,88 +79,230 @@ def show_recipes(df):
         with st.container():
             st.subheader("🌟 Recipe of the Day")
             st.markdown(f"**🍛 Dish Name:** {recipe_of_the_day['dish_name']}")
-            st.markdown(f"**😋 Taste Description:** {recipe_of_the_day['taste_description']}")
+            if recipe_of_the_day['taste_description']:
+                st.markdown(f"**😋 Taste Description:** {recipe_of_the_day['taste_description']}")
             st.markdown("---")
 
     if not df.empty:
+        show_top_rated(df)
+        show_pantry_matches()
+
         # Search and sort filters
         st.markdown("### 🔍 Find Recipes")
-        col1, col2 = st.columns([2, 1])
+        col1, col2, col3 = st.columns([4, 2, 1])
         with col1:
-            search_query = st.text_input("Search by dish name or ingredient").strip().lower()
+            search_query = st.text_input("Search by dish name or ingredient").strip()
         with col2:
-            sort_option = st.selectbox("Sort by", ["Most Recent", "Alphabetical"])
-
-        # Filter recipes
-        df_filtered = df.copy()
-        if search_query:
-            df_filtered = df_filtered[df_filtered.apply(
-                lambda row: search_query in str(row.get("dish_name", "")).lower()
-                            or search_query in str(row.get("ingredients", "")).lower(),
-                axis=1
-            )]
-
-        # Sort
-        if sort_option == "Most Recent":
-            df_filtered = df_filtered.sort_values(by="timestamp", ascending=False)
-        else:
-            df_filtered = df_filtered.sort_values(by="dish_name")
-
-        # Import comment form
-        from app_modules.forms import comment_form
-
-        if not df_filtered.empty:
-            for _, row in df_filtered.iterrows():
-                with st.expander(f"🍲 {row['dish_name']}", expanded=False):
-                    col_main, col_img = st.columns([3, 1])
-
-                    with col_main:
-                        st.markdown(f"**👤 Submitted by:** {row.get('name', 'Anonymous')}")
-                        st.markdown(f"**📂 Category:** {row.get('category', 'N/A')}")
-                        st.markdown(f"**🌍 Country:** {row.get('country', 'N/A')}")
-                        st.markdown("**🧂 Ingredients:**")
-                        st.markdown(f"{row.get('ingredients', '')}")
-                        st.markdown("**👩‍🍳 Instructions:**")
-                        st.markdown(f"{row.get('instructions', '')}")
-                        if row.get("story"):
-                            st.markdown("**📖 Story:**")
-                            st.markdown(f"{row.get('story')}")
-
-                    with col_img:
-                        img_path = row.get("image_path")
-                        if img_path and os.path.exists(img_path):
-                            try:
-                                st.image(img_path, caption="Dish Image", use_column_width=True)
-                            except Exception as e:
-                                st.warning(f"⚠️ Couldn't load image: {e}")
-                        else:
-                            st.caption("📷 No image available")
-
-                    # Comments Section
-                    st.markdown("### 💬 Comments")
-                    comments = get_comments(row["id"])
-                    if comments:
-                        ratings_only = [r for _, _, r, _ in comments if not pd.isna(r)]
-                        if ratings_only:
-                            avg_rating = sum(ratings_only) / len(ratings_only)
-                            stars_avg = "⭐" * int(round(avg_rating))
-                            st.markdown(f"**Average Rating:** {avg_rating:.1f} {stars_avg}")
-
-                        for commenter_name, comment_text, rating, timestamp in comments:
-                            ts_display = timestamp.split("T")[0] if timestamp else ""
-                            stars = "⭐" * int(rating) if not pd.isna(rating) else ""
-                            st.markdown(f"""
-                                <div style='margin-bottom:10px; padding:8px; background-color:#f9f9f9; border-left: 4px solid #ddd;'>
-                                    <strong>{commenter_name}</strong> ({ts_display}) {stars}<br>
-                                    {comment_text}
-                                </div>
-                            """, unsafe_allow_html=True)
-                    else:
-                        st.info("No comments yet. Be the first to share your thoughts!")
-
-                    # Comment form
-                    comment_form(row["id"])
+            sort_option = st.selectbox("Sort by", ["Most Recent", "Alphabetical", "Best Match"])
+        with col3:
+            page_size = st.selectbox("Per page", PAGE_SIZES)
+
+        # Reset paging whenever the query or ordering changes
+        page_key = (search_query, sort_option, page_size)
+        if st.session_state.get("recipe_page_key") != page_key:
+            st.session_state["recipe_page_key"] = page_key
+            st.session_state["recipe_page_cursors"] = [None]
+        cursors = st.session_state["recipe_page_cursors"]
+
+        page, next_cursor = _load_page(search_query, sort_option, page_size, cursors[-1])
+
+        if not page.empty:
+            # One batch fetch each for the heavy text and the comments of
+            # every recipe opened on this page
+            opened = [
+                int(recipe_id) for recipe_id in page["id"]
+                if st.session_state.get(f"open_recipe_{recipe_id}")
+            ]
+            details = get_recipe_detail(opened) if opened else {}
+            comments = get_comments_for_recipes(
+                opened, limit_per_recipe=COMMENTS_PER_RECIPE
+            ) if opened else {}
+            for _, row in page.iterrows():
+                _recipe_list_item(row, details, comments)
+            _pager(cursors, next_cursor)
         else:
             st.warning("No recipes matched your search or filters.")
     else:
         st.info("No recipes submitted yet. Be the first to share a taste of your tradition! 🌍")
+
+@timed("render.top_rated", rows=False)
+def show_top_rated(df):
+    st.markdown("### 🏆 Top Rated")
+    col1, col2 = st.columns(2)
+    with col1:
+        group = st.selectbox("Top rated in", ["Overall", "Category", "Country", "Language"])
+    value = None
+    if group != "Overall":
+        column = group.lower()
+        options = sorted(df[column].dropna().astype(str).unique()) if column in df.columns else []
+        with col2:
+            value = st.selectbox(group, options) if options else None
+        if value is None:
+            st.caption("No ratings yet.")
+            return
+
+    top = get_top_rated(TOP_RATED_COUNT, **({group.lower(): value} if value else {}))
+    if top.empty:
+        st.caption("No ratings yet. Leave a rating on a recipe you've tried!")
+        return
+    for rank, row in enumerate(top.itertuples(), start=1):
+        stars = "⭐" * int(round(row.avg_rating))
+        st.markdown(
+            f"{rank}. **{row.dish_name}** — {row.avg_rating:.1f} {stars} "
+            f"({row.rating_count} ratings)"
+        )
+
+@timed("render.pantry", rows=False)
+def show_pantry_matches():
+    with st.expander("🧺 Cook with what I have"):
+        pantry = st.text_area(
+            "Ingredients you have (one per line)",
+            placeholder="e.g.\nrice\nonion\ngarlic",
+            key="pantry_ingredients",
+        )
+        mode = st.radio("Show", PANTRY_MODES, horizontal=True, key="pantry_mode")
+        if not pantry.strip():
+            return
+
+        if mode == PANTRY_MODES[0]:
+            matches = match_pantry(pantry, limit=PANTRY_RESULTS)
+            if matches.empty:
+                st.info("No recipes use any of those ingredients yet.")
+            for row in matches.itertuples():
+                st.markdown(
+                    f"**{row.dish_name}** — {row.matched}/{row.ingredient_count} "
+                    f"ingredients ({row.coverage:.0%})"
+                )
+                if row.missing:
+                    st.caption("Still needed: " + ", ".join(row.missing))
+        else:
+            recipe_ids = find_recipes_with_ingredients(pantry)
+            if not recipe_ids:
+                st.info("No recipe uses all of those ingredients.")
+                return
+            # Newest first
+            recipes = get_recipes_by_ids(recipe_ids[::-1][:PANTRY_RESULTS])
+            st.caption(f"{len(recipe_ids)} recipes use all of them")
+            for dish_name in recipes["dish_name"]:
+                st.markdown(f"- **{dish_name}**")
+
+def _load_page(search_query, sort_option, page_size, cursor):
+    """Fetch one page of list rows; the cursor's shape depends on the sort."""
+    if not search_query:
+        sort = "Most Recent" if sort_option == "Best Match" else sort_option
+        return get_recipe_page(sort, page_size, cursor=cursor)
+
+    if sort_option == "Best Match":
+        offset = cursor or 0
+        ids = search_recipe_ids(search_query, limit=page_size + 1, offset=offset)
+        next_cursor = offset + page_size if len(ids) > page_size else None
+        return get_recipes_by_ids(ids[:page_size]), next_cursor
+
+    return get_recipe_page(sort_option, page_size, cursor=cursor, search=search_query)
+
+def _pager(cursors, next_cursor):
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        if len(cursors) > 1:
+            st.button("⬅️ Previous", key="recipe_page_prev", on_click=cursors.pop)
+    with col_page:
+        st.caption(f"Page {len(cursors)}")
+    with col_next:
+        if next_cursor is not None:
+            st.button("Next ➡️", key="recipe_page_next",
+                      on_click=cursors.append, args=(next_cursor,))
+
+def _recipe_list_item(row, details, comments):
+    """One list row; details, image, comments and the form load only when opened."""
+    summary = " · ".join(
+        str(value) for value in (row.get("category"), row.get("country"))
+        if value is not None and not pd.isna(value) and value != ""
+    )
+    opened = st.checkbox(f"🍲 {row['dish_name']}", key=f"open_recipe_{row['id']}")
+    if summary:
+        st.caption(summary)
+    if opened:
+        with st.container():
+            _recipe_detail(row, details.get(int(row["id"])), comments.get(int(row["id"])))
+
+@timed("render.recipe_detail", rows=False)
+def _recipe_detail(row, detail, comments=None):
+    # Import comment form
+    from app_modules.forms import comment_form
+
+    recipe_id = int(row["id"])
+    if detail is None:
+        # Not in the page's batch fetch (e.g. rendered outside show_recipes)
+        detail = get_recipe_detail([recipe_id]).get(recipe_id)
+    if detail is None:
+        st.warning("This recipe is no longer available.")
+        return
+    row = {**row.to_dict(), **detail}
+
+    col_main, col_img = st.columns([3, 1])
+
+    with col_main:
+        st.markdown(f"**👤 Submitted by:** {row.get('name', 'Anonymous')}")
+        st.markdown(f"**📂 Category:** {row.get('category', 'N/A')}")
+        st.markdown(f"**🌍 Country:** {row.get('country', 'N/A')}")
+        st.markdown("**🧂 Ingredients:**")
+        st.markdown(f"{row.get('ingredients', '')}")
+        st.markdown("**👩‍🍳 Instructions:**")
+        st.markdown(f"{row.get('instructions', '')}")
+        if row.get("story"):
+            st.markdown("**📖 Story:**")
+            st.markdown(f"{row.get('story')}")
+
+    with col_img:
+        # Thumbnail by default; older rows without variants fall back to the original
+        img_path = row.get("thumb_path") or row.get("image_path")
+        if img_path and os.path.exists(img_path):
+            try:
+                st.image(img_path, caption="Dish Image", use_column_width=True)
+            except Exception as e:
+                st.warning(f"⚠️ Couldn't load image: {e}")
+        else:
+            st.caption("📷 No image available")
+
+    # Comments Section
+    st.markdown("### 💬 Comments")
+    if comments is None:
+        comments = get_comments_for_recipes(
+            [recipe_id], limit_per_recipe=COMMENTS_PER_RECIPE
+        )[recipe_id]
+    if comments:
+        avg_rating = row.get("avg_rating")
+        if avg_rating is not None and not pd.isna(avg_rating):
+            stars_avg = "⭐" * int(round(avg_rating))
+            st.markdown(
+                f"**Average Rating:** {avg_rating:.1f} {stars_avg} "
+                f"({int(row.get('rating_count', 0))} ratings)"
+            )
+
+        for commenter_name, comment_text, rating, timestamp in comments:
+            ts_display = timestamp.split("T")[0] if timestamp else ""
+            stars = "⭐" * int(rating) if not pd.isna(rating) else ""
+            st.markdown(f"""
+                <div style='margin-bottom:10px; padding:8px; background-color:#f9f9f9; border-left: 4px solid #ddd;'>
+                    <strong>{commenter_name}</strong> ({ts_display}) {stars}<br>
+                    {comment_text}
+                </div>
+            """, unsafe_allow_html=True)
+    else:
+        st.info("No comments yet. Be the first to share your thoughts!")
+
+    # Comment form
+    comment_form(recipe_id)
+
+def show_performance_panel(report):
+    """Admin debug panel: where this rerun's time, queries and rows went."""
+    if report is None:
+        return
+    st.markdown("### ⏱️ Performance Breakdown")
+    st.markdown(
+        f"**Rerun:** {report.total_ms:.1f} ms · "
+        f"**SQL queries:** {report.queries} · **Rows fetched:** {report.rows}"
+    )
+    frame = report.as_frame()
+    if not frame.empty:
+        st.dataframe(frame, use_container_width=True)
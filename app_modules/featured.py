@@ -0,0 +1,187 @@
+"""Recipe of the Day: per-date selection, rotation history and a date-keyed cache.
+
+Every featured day is one row in ``recipe_of_the_day_history`` keyed by its
+date. An admin pick overwrites the day's row; on days nobody has set, the
+first reader picks a recipe and persists it, so every rerun and process sees
+the same dish until midnight.
+
+Automatic picks come from the leaderboard's Bayesian score (unrated recipes
+count at the prior mean), skip anything featured in the last
+``ROTATION_DAYS`` days and draw from at most ``CANDIDATES`` rows read off
+indexes — never a random scan of the whole recipes table.
+"""
+import datetime
+import random
+import threading
+
+from app_modules import db, leaderboard
+from app_modules.db import connection
+
+AUTO_PICK = True
+ROTATION_DAYS = 30
+CANDIDATES = 50
+# Weight = score ** WEIGHT_POWER, so a 5-star dish is ~2.8x as likely as a 3-star one
+WEIGHT_POWER = 2
+
+COLUMNS = ["id", "dish_name", "language", "category", "country", "ingredients",
+           "instructions", "story", "image_path", "timestamp",
+           "taste_description", "source"]
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def init_schema(c):
+    # Single-row table from before the rotation history; read once for migration
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS recipe_of_the_day (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            recipe_id INTEGER UNIQUE,
+            taste_description TEXT,
+            date TEXT UNIQUE,
+            FOREIGN KEY(recipe_id) REFERENCES recipes(id)
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS recipe_of_the_day_history (
+            date TEXT PRIMARY KEY,
+            recipe_id INTEGER NOT NULL REFERENCES recipes(id) ON DELETE CASCADE,
+            taste_description TEXT,
+            source TEXT NOT NULL DEFAULT 'admin',
+            created_at TEXT
+        )
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_rotd_history_recipe
+        ON recipe_of_the_day_history(recipe_id, date)
+    """)
+    # Lets HTTP caches (app_modules.api) notice admin and automatic picks
+    c.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES ('featured_version', 0)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        c.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS featured_version_{event[0].lower()}
+            AFTER {event} ON recipe_of_the_day_history BEGIN
+                UPDATE db_meta SET value = value + 1 WHERE key = 'featured_version';
+            END
+        """)
+    c.execute("""
+        INSERT OR IGNORE INTO recipe_of_the_day_history (date, recipe_id, taste_description, source)
+        SELECT rod.date, rod.recipe_id, rod.taste_description, 'admin'
+        FROM recipe_of_the_day rod
+        JOIN recipes r ON r.id = rod.recipe_id
+        WHERE rod.date IS NOT NULL
+    """)
+
+
+def invalidate():
+    with _lock:
+        _cache.clear()
+
+
+def _today():
+    return datetime.datetime.now().date()
+
+
+def set_for_date(recipe_id, taste_description, date=None, source="admin"):
+    date = (date or _today()).isoformat()
+    with connection() as conn:
+        conn.execute("""
+            INSERT INTO recipe_of_the_day_history
+                (date, recipe_id, taste_description, source, created_at)
+            VALUES (?, ?, ?, ?, datetime('now'))
+            ON CONFLICT(date) DO UPDATE SET
+                recipe_id = excluded.recipe_id,
+                taste_description = excluded.taste_description,
+                source = excluded.source,
+                created_at = excluded.created_at
+        """, (date, recipe_id, taste_description, source))
+    invalidate()
+
+
+def _fetch(conn, date):
+    row = conn.execute("""
+        SELECT r.id, r.dish_name, r.language, r.category, r.country, r.ingredients,
+            r.instructions, r.story, r.image_path, r.timestamp,
+            h.taste_description, h.source
+        FROM recipe_of_the_day_history h
+        JOIN recipes r ON h.recipe_id = r.id
+        WHERE h.date = ?
+    """, (date,)).fetchone()
+    return dict(zip(COLUMNS, row)) if row else None
+
+
+def _candidates(conn, since):
+    """Up to CANDIDATES (recipe_id, score) pairs not featured since ``since``."""
+    recent = """
+        NOT EXISTS (
+            SELECT 1 FROM recipe_of_the_day_history h
+            WHERE h.recipe_id = {ref} AND h.date >= ?
+        )
+    """
+    rows = conn.execute(f"""
+        SELECT rr.recipe_id, rr.bayes_score
+        FROM recipe_ratings rr
+        WHERE rr.rating_count > 0 AND {recent.format(ref="rr.recipe_id")}
+        ORDER BY rr.bayes_score DESC, rr.rating_count DESC
+        LIMIT ?
+    """, (since, CANDIDATES)).fetchall()
+    if len(rows) < CANDIDATES:
+        # Top up with the newest unrated recipes at the prior mean
+        rows += conn.execute(f"""
+            SELECT r.id, {leaderboard.PRIOR_MEAN}
+            FROM recipes r
+            WHERE NOT EXISTS (
+                SELECT 1 FROM recipe_ratings rr
+                WHERE rr.recipe_id = r.id AND rr.rating_count > 0
+            ) AND {recent.format(ref="r.id")}
+            ORDER BY COALESCE(r.timestamp, '') DESC, r.id DESC
+            LIMIT ?
+        """, (since, CANDIDATES - len(rows))).fetchall()
+    if not rows:
+        # Everything was featured recently: bring back the longest-rested dish
+        rows = conn.execute("""
+            SELECT h.recipe_id, 1.0
+            FROM recipe_of_the_day_history h
+            GROUP BY h.recipe_id
+            ORDER BY MAX(h.date)
+            LIMIT 1
+        """).fetchall()
+    return rows
+
+
+def _auto_pick(conn, day):
+    since = (day - datetime.timedelta(days=ROTATION_DAYS)).isoformat()
+    candidates = _candidates(conn, since)
+    if not candidates:
+        return
+    # Seeded by date so concurrent processes agree on the same pick
+    rng = random.Random(day.isoformat())
+    ids = [recipe_id for recipe_id, _ in candidates]
+    weights = [max(score or 0, 0.1) ** WEIGHT_POWER for _, score in candidates]
+    recipe_id = rng.choices(ids, weights=weights)[0]
+    conn.execute("""
+        INSERT OR IGNORE INTO recipe_of_the_day_history
+            (date, recipe_id, taste_description, source, created_at)
+        VALUES (?, ?, NULL, 'auto', datetime('now'))
+    """, (day.isoformat(), recipe_id))
+
+
+def get_for_date(day=None):
+    """The featured recipe for ``day`` (default today), picking one if unset."""
+    day = day or _today()
+    key = (db.DB_FILE, day.isoformat())
+    with _lock:
+        if key in _cache:
+            return _cache[key]
+
+    with connection() as conn:
+        featured = _fetch(conn, day.isoformat())
+        if featured is None and AUTO_PICK:
+            _auto_pick(conn, day)
+            featured = _fetch(conn, day.isoformat())
+
+    if featured is not None:
+        with _lock:
+            _cache[key] = featured
+    return featured
+
@@ -1,19 +1,27 @@
-import os
-import pandas as pd
+import sqlite3
 import streamlit as st
 from app_modules.utils import (
     is_duplicate,
-    add_entry,
+    insert_recipe,
+    load_data,
+    find_similar_recipes,
     get_timestamp,
     save_image,
     add_comment
 )
+from app_modules.instrumentation import timed
+from app_modules import comments_csv
+from app_modules.write_queue import WriteQueueFull
 
 COMMENTS_FILE = "data/comments.csv"
+BUSY_MESSAGE = "⏳ Lots of people are sharing right now. Please submit again in a moment."
+# A full write queue, or a database still locked once the busy timeout ran out
+BUSY_ERRORS = (WriteQueueFull, sqlite3.OperationalError)
 
 # -----------------------
 # Recipe submission form
 # -----------------------
+@timed("render.recipe_form", rows=False)
 def recipe_form(df):
     """Display recipe submission form and return updated DataFrame."""
     with st.expander("📝 Submit a New Recipe", expanded=True):
@@ -62,10 +70,16 @@ def recipe_form(df):
             # Validation & submission
             if submitted:
                 if dish and ingredients and instructions:
-                    if is_duplicate(df, name, dish):
+                    if is_duplicate(name, dish):
                         st.warning("⚠️ This recipe has already been submitted.")
                     else:
-                        image_path = save_image(image_file, dish) if image_file else None
+                        image_fields = {"image_path": None}
+                        if image_file:
+                            try:
+                                image_fields = save_image(image_file)
+                            except OSError:
+                                st.error("❌ The uploaded file couldn't be read as an image.")
+                                return df
                         entry = {
                             "name": name,
                             "language": language,
@@ -75,11 +89,23 @@ def recipe_form(df):
                             "ingredients": ingredients,
                             "instructions": instructions,
                             "story": story,
-                            "image_path": image_path,
-                            "timestamp": get_timestamp()
+                            "timestamp": get_timestamp(),
+                            **image_fields
                         }
-                        df = add_entry(df, entry)
-                        st.success("🎉 Thank you! Your recipe has been submitted successfully.")
+                        try:
+                            recipe_id = insert_recipe(entry)
+                        except BUSY_ERRORS:
+                            st.warning(BUSY_MESSAGE)
+                            return df
+                        if recipe_id is None:
+                            st.warning("⚠️ This recipe has already been submitted.")
+                        else:
+                            df = load_data()
+                            st.success("🎉 Thank you! Your recipe has been submitted successfully.")
+                            similar = find_similar_recipes(ingredients, exclude_id=recipe_id)
+                            if similar:
+                                names = ", ".join(dish_name for _, dish_name, _ in similar[:3])
+                                st.info(f"👀 Recipes with similar ingredients: {names}")
                 else:
                     st.error("❌ Please fill in all required fields marked with *.")
 
@@ -112,12 +138,16 @@ def comment_form(recipe_id):
 
         if submitted:
             if comment_text.strip():
-                add_comment(
-                    recipe_id,
-                    commenter_name.strip() or "Anonymous",
-                    comment_text.strip(),
-                    rating
-                )
+                try:
+                    add_comment(
+                        recipe_id,
+                        commenter_name.strip() or "Anonymous",
+                        comment_text.strip(),
+                        rating
+                    )
+                except BUSY_ERRORS:
+                    st.warning(BUSY_MESSAGE)
+                    return
                 st.success(f"✅ Thank you! You rated this recipe {rating}⭐.")
                 st.experimental_rerun()
             else:
@@ -127,24 +157,9 @@ def comment_form(recipe_id):
 # CSV fallback
 # -----------------------
 def add_comment_csv(recipe_id, name, comment, rating):
-    """Fallback: store comment + rating in CSV file."""
-    new_comment = pd.DataFrame([{
-        "recipe_id": recipe_id,
-        "name": name,
-        "comment": comment,
-        "rating": rating
-    }])
-
-    try:
-        df = pd.read_csv(COMMENTS_FILE)
-        df = pd.concat([df, new_comment], ignore_index=True)
-    except FileNotFoundError:
-        df = new_comment
-
-    df.to_csv(COMMENTS_FILE, index=False)
+    """Fallback: append comment + rating to the CSV file."""
+    comments_csv.appender(COMMENTS_FILE).append(recipe_id, name, comment, rating)
 
 def get_top_rated_recipes_csv():
     """Fallback: get top rated recipes from CSV."""
-    df = pd.read_csv(COMMENTS_FILE)
-    avg_ratings = df.groupby("recipe_id")["rating"].mean().reset_index()
-    return avg_ratings.sort_values(by="rating", ascending=False)
+    return comments_csv.top_rated(COMMENTS_FILE)
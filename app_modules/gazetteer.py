@@ -0,0 +1,272 @@
+"""Offline country centroids used before any network geocoding.
+
+Coordinates are approximate geographic centres (latitude, longitude), keyed
+by the normalized country name produced by ``normalize_place``.
+"""
+import re
+import unicodedata
+
+COUNTRY_CENTROIDS = {
+    "afghanistan": (33.94, 67.71),
+    "albania": (41.15, 20.17),
+    "algeria": (28.03, 1.66),
+    "andorra": (42.55, 1.60),
+    "angola": (-11.20, 17.87),
+    "antigua and barbuda": (17.06, -61.80),
+    "argentina": (-38.42, -63.62),
+    "armenia": (40.07, 45.04),
+    "australia": (-25.27, 133.78),
+    "austria": (47.52, 14.55),
+    "azerbaijan": (40.14, 47.58),
+    "bahamas": (25.03, -77.40),
+    "bahrain": (25.93, 50.64),
+    "bangladesh": (23.68, 90.36),
+    "barbados": (13.19, -59.54),
+    "belarus": (53.71, 27.95),
+    "belgium": (50.50, 4.47),
+    "belize": (17.19, -88.50),
+    "benin": (9.31, 2.32),
+    "bhutan": (27.51, 90.43),
+    "bolivia": (-16.29, -63.59),
+    "bosnia and herzegovina": (43.92, 17.68),
+    "botswana": (-22.33, 24.68),
+    "brazil": (-14.24, -51.93),
+    "brunei": (4.54, 114.73),
+    "bulgaria": (42.73, 25.49),
+    "burkina faso": (12.24, -1.56),
+    "burundi": (-3.37, 29.92),
+    "cambodia": (12.57, 104.99),
+    "cameroon": (7.37, 12.35),
+    "canada": (56.13, -106.35),
+    "cape verde": (16.00, -24.01),
+    "central african republic": (6.61, 20.94),
+    "chad": (15.45, 18.73),
+    "chile": (-35.68, -71.54),
+    "china": (35.86, 104.20),
+    "colombia": (4.57, -74.30),
+    "comoros": (-11.88, 43.87),
+    "congo": (-0.23, 15.83),
+    "costa rica": (9.75, -83.75),
+    "croatia": (45.10, 15.20),
+    "cuba": (21.52, -77.78),
+    "cyprus": (35.13, 33.43),
+    "czech republic": (49.82, 15.47),
+    "democratic republic of the congo": (-4.04, 21.76),
+    "denmark": (56.26, 9.50),
+    "djibouti": (11.83, 42.59),
+    "dominica": (15.41, -61.37),
+    "dominican republic": (18.74, -70.16),
+    "ecuador": (-1.83, -78.18),
+    "egypt": (26.82, 30.80),
+    "el salvador": (13.79, -88.90),
+    "equatorial guinea": (1.65, 10.27),
+    "eritrea": (15.18, 39.78),
+    "estonia": (58.60, 25.01),
+    "eswatini": (-26.52, 31.47),
+    "ethiopia": (9.15, 40.49),
+    "fiji": (-16.58, 179.41),
+    "finland": (61.92, 25.75),
+    "france": (46.23, 2.21),
+    "gabon": (-0.80, 11.61),
+    "gambia": (13.44, -15.31),
+    "georgia": (42.32, 43.36),
+    "germany": (51.17, 10.45),
+    "ghana": (7.95, -1.02),
+    "greece": (39.07, 21.82),
+    "grenada": (12.26, -61.60),
+    "guatemala": (15.78, -90.23),
+    "guinea": (9.95, -9.70),
+    "guinea-bissau": (11.80, -15.18),
+    "guyana": (4.86, -58.93),
+    "haiti": (18.97, -72.29),
+    "honduras": (15.20, -86.24),
+    "hungary": (47.16, 19.50),
+    "iceland": (64.96, -19.02),
+    "india": (20.59, 78.96),
+    "indonesia": (-0.79, 113.92),
+    "iran": (32.43, 53.69),
+    "iraq": (33.22, 43.68),
+    "ireland": (53.41, -8.24),
+    "israel": (31.05, 34.85),
+    "italy": (41.87, 12.57),
+    "ivory coast": (7.54, -5.55),
+    "jamaica": (18.11, -77.30),
+    "japan": (36.20, 138.25),
+    "jordan": (30.59, 36.24),
+    "kazakhstan": (48.02, 66.92),
+    "kenya": (-0.02, 37.91),
+    "kiribati": (-3.37, -168.73),
+    "kosovo": (42.60, 20.90),
+    "kuwait": (29.31, 47.48),
+    "kyrgyzstan": (41.20, 74.77),
+    "laos": (19.86, 102.50),
+    "latvia": (56.88, 24.60),
+    "lebanon": (33.85, 35.86),
+    "lesotho": (-29.61, 28.23),
+    "liberia": (6.43, -9.43),
+    "libya": (26.34, 17.23),
+    "liechtenstein": (47.17, 9.56),
+    "lithuania": (55.17, 23.88),
+    "luxembourg": (49.82, 6.13),
+    "madagascar": (-18.77, 46.87),
+    "malawi": (-13.25, 34.30),
+    "malaysia": (4.21, 101.98),
+    "maldives": (3.20, 73.22),
+    "mali": (17.57, -4.00),
+    "malta": (35.94, 14.38),
+    "marshall islands": (7.13, 171.18),
+    "mauritania": (21.01, -10.94),
+    "mauritius": (-20.35, 57.55),
+    "mexico": (23.63, -102.55),
+    "micronesia": (7.43, 150.55),
+    "moldova": (47.41, 28.37),
+    "monaco": (43.75, 7.41),
+    "mongolia": (46.86, 103.85),
+    "montenegro": (42.71, 19.37),
+    "morocco": (31.79, -7.09),
+    "mozambique": (-18.67, 35.53),
+    "myanmar": (21.91, 95.96),
+    "namibia": (-22.96, 18.49),
+    "nauru": (-0.52, 166.93),
+    "nepal": (28.39, 84.12),
+    "netherlands": (52.13, 5.29),
+    "new zealand": (-40.90, 174.89),
+    "nicaragua": (12.87, -85.21),
+    "niger": (17.61, 8.08),
+    "nigeria": (9.08, 8.68),
+    "north korea": (40.34, 127.51),
+    "north macedonia": (41.61, 21.75),
+    "norway": (60.47, 8.47),
+    "oman": (21.51, 55.92),
+    "pakistan": (30.38, 69.35),
+    "palau": (7.51, 134.58),
+    "palestine": (31.95, 35.23),
+    "panama": (8.54, -80.78),
+    "papua new guinea": (-6.31, 143.96),
+    "paraguay": (-23.44, -58.44),
+    "peru": (-9.19, -75.02),
+    "philippines": (12.88, 121.77),
+    "poland": (51.92, 19.15),
+    "portugal": (39.40, -8.22),
+    "qatar": (25.35, 51.18),
+    "romania": (45.94, 24.97),
+    "russia": (61.52, 105.32),
+    "rwanda": (-1.94, 29.87),
+    "saint kitts and nevis": (17.36, -62.78),
+    "saint lucia": (13.91, -60.98),
+    "saint vincent and the grenadines": (12.98, -61.29),
+    "samoa": (-13.76, -172.10),
+    "san marino": (43.94, 12.46),
+    "sao tome and principe": (0.19, 6.61),
+    "saudi arabia": (23.89, 45.08),
+    "senegal": (14.50, -14.45),
+    "serbia": (44.02, 21.01),
+    "seychelles": (-4.68, 55.49),
+    "sierra leone": (8.46, -11.78),
+    "singapore": (1.35, 103.82),
+    "slovakia": (48.67, 19.70),
+    "slovenia": (46.15, 14.99),
+    "solomon islands": (-9.65, 160.16),
+    "somalia": (5.15, 46.20),
+    "south africa": (-30.56, 22.94),
+    "south korea": (35.91, 127.77),
+    "south sudan": (6.88, 31.31),
+    "spain": (40.46, -3.75),
+    "sri lanka": (7.87, 80.77),
+    "sudan": (12.86, 30.22),
+    "suriname": (3.92, -56.03),
+    "sweden": (60.13, 18.64),
+    "switzerland": (46.82, 8.23),
+    "syria": (34.80, 38.997),
+    "taiwan": (23.70, 120.96),
+    "tajikistan": (38.86, 71.28),
+    "tanzania": (-6.37, 34.89),
+    "thailand": (15.87, 100.99),
+    "timor-leste": (-8.87, 125.73),
+    "togo": (8.62, 0.82),
+    "tonga": (-21.18, -175.20),
+    "trinidad and tobago": (10.69, -61.22),
+    "tunisia": (33.89, 9.54),
+    "turkey": (38.96, 35.24),
+    "turkmenistan": (38.97, 59.56),
+    "tuvalu": (-7.11, 177.65),
+    "uganda": (1.37, 32.29),
+    "ukraine": (48.38, 31.17),
+    "united arab emirates": (23.42, 53.85),
+    "united kingdom": (55.38, -3.44),
+    "united states": (37.09, -95.71),
+    "uruguay": (-32.52, -55.77),
+    "uzbekistan": (41.38, 64.59),
+    "vanuatu": (-15.38, 166.96),
+    "vatican city": (41.90, 12.45),
+    "venezuela": (6.42, -66.59),
+    "vietnam": (14.06, 108.28),
+    "yemen": (15.55, 48.52),
+    "zambia": (-13.13, 27.85),
+    "zimbabwe": (-19.02, 29.15),
+}
+
+ALIASES = {
+    "bharat": "india",
+    "hindustan": "india",
+    "bharat ganarajya": "india",
+    "usa": "united states",
+    "us": "united states",
+    "u s a": "united states",
+    "united states of america": "united states",
+    "america": "united states",
+    "uk": "united kingdom",
+    "u k": "united kingdom",
+    "great britain": "united kingdom",
+    "britain": "united kingdom",
+    "england": "united kingdom",
+    "scotland": "united kingdom",
+    "wales": "united kingdom",
+    "uae": "united arab emirates",
+    "emirates": "united arab emirates",
+    "prc": "china",
+    "people's republic of china": "china",
+    "republic of korea": "south korea",
+    "korea": "south korea",
+    "dprk": "north korea",
+    "russian federation": "russia",
+    "burma": "myanmar",
+    "ceylon": "sri lanka",
+    "persia": "iran",
+    "holland": "netherlands",
+    "the netherlands": "netherlands",
+    "czechia": "czech republic",
+    "cote d'ivoire": "ivory coast",
+    "swaziland": "eswatini",
+    "macedonia": "north macedonia",
+    "east timor": "timor-leste",
+    "turkiye": "turkey",
+    "viet nam": "vietnam",
+    "drc": "democratic republic of the congo",
+    "dr congo": "democratic republic of the congo",
+    "republic of the congo": "congo",
+    "the gambia": "gambia",
+    "the bahamas": "bahamas",
+}
+
+
+def normalize_place(name):
+    """Casefold, strip accents and collapse whitespace/punctuation."""
+    if not name or not isinstance(name, str):
+        return ""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.casefold().replace(".", " ")
+    text = re.sub(r"[^\w'\- ]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def canonical_country(name):
+    """Return the gazetteer key for ``name`` (aliases resolved)."""
+    key = normalize_place(name)
+    return ALIASES.get(key, key)
+
+
+def lookup_centroid(name):
+    """Return (lat, lon) from the offline gazetteer, or None."""
+    return COUNTRY_CENTROIDS.get(canonical_country(name))
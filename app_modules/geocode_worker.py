@@ -0,0 +1,171 @@
+"""Background geocoding so saving a recipe never waits on the network.
+
+``insert_recipe`` stores coordinates straight away when the country is
+already known (LRU, gazetteer or ``geocode_cache``); otherwise the row goes
+in with null coordinates and the country is queued here. Worker threads
+resolve each queued country once, no faster than ``MIN_INTERVAL`` seconds
+between network calls (Nominatim allows 1 request/second), retry transient
+failures with exponential backoff, and fill every recipe still missing
+coordinates for that country.
+
+``start()`` also queues a backfill of existing rows with null latitude. The
+backend is whatever ``geocoding.set_geocoder`` installed, so tests can run
+the worker against a local stub.
+"""
+import queue
+import threading
+import time
+
+from app_modules import dataset, geocoding
+from app_modules.db import connection
+
+WORKERS = 1
+MIN_INTERVAL = 1.0
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+
+_queue = queue.Queue()
+_pending = set()
+_lock = threading.Lock()
+_threads = []
+_stop = threading.Event()
+_stats = {"queued": 0, "resolved": 0, "unresolved": 0, "retries": 0, "failed": 0, "rows_updated": 0}
+
+
+class _RateLimiter:
+    """Spaces calls at least ``interval`` seconds apart across all workers."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            _stop.wait(delay)
+
+
+_limiter = _RateLimiter(MIN_INTERVAL)
+
+
+def stats():
+    stats = dict(_stats)
+    stats["pending"] = len(_pending)
+    return stats
+
+
+def is_running():
+    return any(thread.is_alive() for thread in _threads)
+
+
+def enqueue(country):
+    """Queue ``country`` unless it is blank or already pending."""
+    if not country or not str(country).strip():
+        return False
+    with _lock:
+        if country in _pending:
+            return False
+        _pending.add(country)
+    _stats["queued"] += 1
+    _queue.put(country)
+    return True
+
+
+def backfill():
+    """Queue every country that still has recipes without coordinates."""
+    with connection() as conn:
+        countries = [row[0] for row in conn.execute(
+            "SELECT DISTINCT country FROM recipes WHERE latitude IS NULL AND country IS NOT NULL"
+        )]
+    return sum(enqueue(country) for country in countries)
+
+
+def _apply(country, coords):
+    with connection() as conn:
+        cursor = conn.execute("""
+            UPDATE recipes SET latitude = ?, longitude = ?
+            WHERE country = ? AND latitude IS NULL
+        """, (coords[0], coords[1], country))
+        updated = cursor.rowcount
+    _stats["rows_updated"] += updated
+    if updated:
+        dataset.invalidate()
+
+
+def _resolve(country):
+    for attempt in range(MAX_ATTEMPTS):
+        if geocoding.lookup_cached(country) is None:
+            # Only network lookups count against the rate limit
+            _limiter.wait()
+        try:
+            return geocoding.geocode(country, raise_errors=True)
+        except Exception:
+            if attempt + 1 == MAX_ATTEMPTS:
+                _stats["failed"] += 1
+                return None
+            _stats["retries"] += 1
+            if _stop.wait(min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX)):
+                return None
+    return None
+
+
+def _run():
+    while not _stop.is_set():
+        try:
+            country = _queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        try:
+            coords = _resolve(country)
+            if coords and coords[0] is not None:
+                _stats["resolved"] += 1
+                _apply(country, coords)
+            elif coords is not None:
+                _stats["unresolved"] += 1
+        except Exception as e:
+            print(f"⚠️ Geocoding '{country}' failed: {e}")
+        finally:
+            with _lock:
+                _pending.discard(country)
+            _queue.task_done()
+
+
+def start(workers=WORKERS, min_interval=None, run_backfill=True):
+    """Start the worker threads once per process; later calls are no-ops."""
+    with _lock:
+        if any(thread.is_alive() for thread in _threads):
+            return False
+        _stop.clear()
+        if min_interval is not None:
+            _limiter.interval = min_interval
+        _threads[:] = [
+            threading.Thread(target=_run, name=f"geocode-worker-{n}", daemon=True)
+            for n in range(workers)
+        ]
+        for thread in _threads:
+            thread.start()
+    if run_backfill:
+        backfill()
+    return True
+
+
+def stop(timeout=5.0):
+    _stop.set()
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
+
+
+def wait_idle(timeout=None):
+    """Block until the queue is drained; returns False on timeout."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while _queue.unfinished_tasks:
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
@@ -0,0 +1,241 @@
+"""Country geocoding with in-process LRU, offline gazetteer and SQLite cache.
+
+Lookup order: LRU -> bundled gazetteer -> ``geocode_cache`` table -> network.
+Network results (including misses) are persisted with a TTL so repeated
+reruns never hit Nominatim for a place that was already resolved.
+
+``geocode_cache.hits`` is counted in memory and written through the write
+queue at most once per ``HIT_FLUSH_INTERVAL``, so lookups stay read-only.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from app_modules import write_queue
+from app_modules.db import connection
+from app_modules.gazetteer import canonical_country, lookup_centroid
+
+LRU_SIZE = 1024
+POSITIVE_TTL = 90 * 24 * 3600
+NEGATIVE_TTL = 24 * 3600
+USER_AGENT = "roots_and_recipes"
+HIT_FLUSH_INTERVAL = 60.0
+
+_lru = OrderedDict()
+_lru_lock = threading.Lock()
+_stats = {"lru_hits": 0, "gazetteer_hits": 0, "cache_hits": 0, "network_calls": 0, "misses": 0}
+_client = None
+_geocoder = None
+_hits = {}
+_hits_lock = threading.Lock()
+_hits_flushed_at = 0.0
+
+
+def init_schema(c):
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS geocode_cache (
+            place_key TEXT PRIMARY KEY,
+            latitude REAL,
+            longitude REAL,
+            source TEXT,
+            resolved_at REAL,
+            hits INTEGER DEFAULT 0
+        )
+    """)
+
+
+def _nominatim_geocode(place):
+    global _client
+    if _client is None:
+        from geopy.geocoders import Nominatim
+        _client = Nominatim(user_agent=USER_AGENT)
+    location = _client.geocode(place)
+    if location:
+        return (location.latitude, location.longitude)
+    return None
+
+
+def set_geocoder(fn):
+    """Replace the network backend; ``fn(place)`` returns (lat, lon) or None."""
+    global _geocoder
+    _geocoder = fn
+    clear_lru()
+
+
+def clear_lru():
+    with _lru_lock:
+        _lru.clear()
+
+
+def stats():
+    """Return a copy of the hit/miss counters for this process."""
+    return dict(_stats)
+
+
+def _lru_get(key):
+    with _lru_lock:
+        entry = _lru.get(key)
+        if entry is None:
+            return None
+        coords, expires_at = entry
+        if expires_at < time.time():
+            del _lru[key]
+            return None
+        _lru.move_to_end(key)
+        return coords
+
+
+def _lru_put(key, coords, ttl):
+    with _lru_lock:
+        _lru[key] = (coords, time.time() + ttl)
+        _lru.move_to_end(key)
+        while len(_lru) > LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def _cache_get(key):
+    with connection() as conn:
+        row = conn.execute("""
+            SELECT latitude, longitude, resolved_at FROM geocode_cache WHERE place_key = ?
+        """, (key,)).fetchone()
+        if row is None:
+            return None
+        lat, lon, resolved_at = row
+        ttl = POSITIVE_TTL if lat is not None else NEGATIVE_TTL
+        if resolved_at is None or resolved_at + ttl < time.time():
+            return None
+    _count_hit(key)
+    return (lat, lon), ttl - (time.time() - resolved_at)
+
+
+def _count_hit(key):
+    with _hits_lock:
+        _hits[key] = _hits.get(key, 0) + 1
+        due = time.monotonic() - _hits_flushed_at >= HIT_FLUSH_INTERVAL
+    if due:
+        flush_hits()
+
+
+def _write_hits(conn, hits):
+    conn.executemany(
+        "UPDATE geocode_cache SET hits = hits + ? WHERE place_key = ?",
+        [(count, key) for key, count in hits.items()],
+    )
+
+
+def flush_hits():
+    """Queue the in-memory hit counts for writing; returns the write's future."""
+    global _hits_flushed_at
+    with _hits_lock:
+        pending = dict(_hits)
+        _hits.clear()
+        _hits_flushed_at = time.monotonic()
+    if not pending:
+        return None
+    try:
+        return write_queue.submit(_write_hits, pending)
+    except write_queue.WriteQueueFull:
+        # Only a statistic; keep the counts for the next flush
+        with _hits_lock:
+            for key, count in pending.items():
+                _hits[key] = _hits.get(key, 0) + count
+        return None
+
+
+def _cache_put(key, coords, source):
+    with connection() as conn:
+        conn.execute("""
+            INSERT INTO geocode_cache (place_key, latitude, longitude, source, resolved_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(place_key) DO UPDATE SET
+                latitude=excluded.latitude,
+                longitude=excluded.longitude,
+                source=excluded.source,
+                resolved_at=excluded.resolved_at
+        """, (key, coords[0], coords[1], source, time.time()))
+
+
+def lookup_cached(place):
+    """Resolve ``place`` without touching the network; None if unknown."""
+    key = canonical_country(place)
+    if not key:
+        return (None, None)
+    coords = _lru_get(key)
+    if coords is not None:
+        _stats["lru_hits"] += 1
+        return coords
+    centroid = lookup_centroid(key)
+    if centroid is not None:
+        _stats["gazetteer_hits"] += 1
+        _lru_put(key, centroid, POSITIVE_TTL)
+        return centroid
+    cached = _cache_get(key)
+    if cached is not None:
+        coords, remaining = cached
+        _stats["cache_hits"] += 1
+        _lru_put(key, coords, remaining)
+        return coords
+    return None
+
+
+def geocode(place, raise_errors=False):
+    """Return (lat, lon) for a country name, or (None, None).
+
+    Network failures count as a miss without being cached; with
+    ``raise_errors`` they propagate instead, so callers can retry.
+    """
+    coords = lookup_cached(place)
+    if coords is not None:
+        return coords
+
+    key = canonical_country(place)
+    _stats["network_calls"] += 1
+    try:
+        result = (_geocoder or _nominatim_geocode)(place)
+    except Exception:
+        # Transient failure: don't poison the persistent cache.
+        _stats["misses"] += 1
+        if raise_errors:
+            raise
+        return (None, None)
+
+    if result:
+        coords = (result[0], result[1])
+        _cache_put(key, coords, "network")
+        _lru_put(key, coords, POSITIVE_TTL)
+    else:
+        coords = (None, None)
+        _stats["misses"] += 1
+        _cache_put(key, coords, "network")
+        _lru_put(key, coords, NEGATIVE_TTL)
+    return coords
+
+
+def resolve_coordinates(df, column="country"):
+    """Fill missing latitude/longitude for a whole DataFrame in one merge.
+
+    Each distinct place is geocoded once; rows that already have
+    coordinates are left untouched.
+    """
+    df = df.copy()
+    for col in ("latitude", "longitude"):
+        if col not in df.columns:
+            df[col] = float("nan")
+    if column not in df.columns or df.empty:
+        return df
+
+    missing = df["latitude"].isna() | df["longitude"].isna()
+    places = df.loc[missing, column].dropna().unique()
+    if len(places) == 0:
+        return df
+
+    lookup = pd.DataFrame(
+        [(place, *geocode(place)) for place in places],
+        columns=[column, "_lat", "_lon"],
+    )
+    merged = df[[column]].merge(lookup, on=column, how="left")
+    df["latitude"] = df["latitude"].where(~missing, merged["_lat"].to_numpy(dtype=float))
+    df["longitude"] = df["longitude"].where(~missing, merged["_lon"].to_numpy(dtype=float))
+    return df
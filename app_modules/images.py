@@ -0,0 +1,174 @@
+"""Upload processing: EXIF-stripped, size-bounded, content-addressed variants.
+
+Each upload is hashed (SHA-256 of the raw bytes) and stored as
+``data/images/<hh>/<hash>_<variant>.<ext>``, so re-uploading the same photo
+reuses the existing files. Variants are re-encoded from pixels only, which
+drops EXIF/GPS metadata, and are written as WebP when Pillow supports it.
+
+Run ``python -m app_modules.images`` to build variants for recipes whose
+images predate the pipeline.
+"""
+import argparse
+import hashlib
+import io
+import os
+import re
+import tempfile
+
+from PIL import Image, ImageOps, features
+
+from app_modules import dataset
+from app_modules.db import connection
+from app_modules.instrumentation import timed
+
+IMAGE_DIR = "data/images"
+_STORED_NAME = re.compile(r"^([0-9a-f]{64})_detail\.(\w+)$")
+
+VARIANTS = {
+    "thumb": (320, 320),
+    "detail": (1280, 1280),
+}
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+
+def _output_format():
+    return ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+
+
+def variant_path(image_hash, variant):
+    _, ext = _output_format()
+    return os.path.join(IMAGE_DIR, image_hash[:2], f"{image_hash}_{variant}.{ext}")
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _encode(image, size):
+    fmt, _ = _output_format()
+    variant = image.copy()
+    variant.thumbnail(size, Image.LANCZOS)
+    if fmt == "JPEG" and variant.mode != "RGB":
+        variant = variant.convert("RGB")
+    elif variant.mode not in ("RGB", "RGBA"):
+        variant = variant.convert("RGBA" if "A" in variant.getbands() else "RGB")
+    buffer = io.BytesIO()
+    if fmt == "WEBP":
+        variant.save(buffer, format=fmt, quality=WEBP_QUALITY, method=4)
+    else:
+        variant.save(buffer, format=fmt, quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+@timed(rows=False)
+def store_image(data):
+    """Store variants for raw image bytes; return their paths and content hash.
+
+    Raises ``PIL.UnidentifiedImageError`` (an ``OSError``) for non-images.
+    """
+    image_hash = hashlib.sha256(data).hexdigest()
+    paths = {variant: variant_path(image_hash, variant) for variant in VARIANTS}
+
+    missing = [variant for variant, path in paths.items() if not os.path.exists(path)]
+    if missing:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            for variant in missing:
+                _write_atomic(paths[variant], _encode(image, VARIANTS[variant]))
+
+    return {
+        "image_path": paths["detail"],
+        "thumb_path": paths["thumb"],
+        "image_hash": image_hash,
+    }
+
+
+def _local_path(path):
+    # Rows created on Windows store backslash-separated paths
+    if not os.path.exists(path) and "\\" in path:
+        return os.path.join(*path.split("\\"))
+    return path
+
+
+def stored_variants(path):
+    """The ``store_image`` result for an already stored detail variant, or None.
+
+    Lets exported rows point back at their files instead of re-encoding them.
+    """
+    path = _local_path(path)
+    match = _STORED_NAME.match(os.path.basename(path))
+    if not match:
+        return None
+    image_hash, ext = match.groups()
+    directory = os.path.join(IMAGE_DIR, image_hash[:2])
+    if os.path.abspath(os.path.dirname(path)) != os.path.abspath(directory):
+        return None
+    paths = {
+        variant: os.path.join(directory, f"{image_hash}_{variant}.{ext}") for variant in VARIANTS
+    }
+    if not all(os.path.exists(p) for p in paths.values()):
+        return None
+    return {
+        "image_path": paths["detail"],
+        "thumb_path": paths["thumb"],
+        "image_hash": image_hash,
+    }
+
+
+def backfill_variants(limit=None):
+    """Create variants for recipes with an image but no thumbnail.
+
+    Returns (processed, failed) counts. Source files are left in place.
+    """
+    with connection() as conn:
+        rows = conn.execute("""
+            SELECT id, image_path FROM recipes
+            WHERE image_path IS NOT NULL AND image_path != '' AND thumb_path IS NULL
+            ORDER BY id
+            LIMIT ?
+        """, (-1 if limit is None else limit,)).fetchall()
+
+    processed = failed = 0
+    for recipe_id, image_path in rows:
+        try:
+            with open(_local_path(image_path), "rb") as f:
+                stored = store_image(f.read())
+        except OSError as e:
+            print(f"⚠️ Recipe {recipe_id}: couldn't process {image_path}: {e}")
+            failed += 1
+            continue
+        with connection() as conn:
+            conn.execute("""
+                UPDATE recipes SET image_path = ?, thumb_path = ?, image_hash = ?
+                WHERE id = ?
+            """, (stored["image_path"], stored["thumb_path"], stored["image_hash"], recipe_id))
+        processed += 1
+
+    if processed:
+        dataset.invalidate()
+    return processed, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill thumbnail/detail variants for existing recipe images.")
+    parser.add_argument("--limit", type=int, default=None, help="process at most N recipes")
+    args = parser.parse_args(argv)
+
+    from app_modules.utils import init_storage
+    init_storage()
+    processed, failed = backfill_variants(limit=args.limit)
+    print(f"✅ Processed {processed} image(s), {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
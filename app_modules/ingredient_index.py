@@ -0,0 +1,290 @@
+"""Ingredient inverted index for "contains all of" and pantry matching.
+
+Each recipe's ingredient text is parsed at write time, one ingredient per
+line (a single comma-separated line also works), into normalized names with
+quantities and units stripped: "2 cups Basmati rice, washed" -> "basmati rice".
+
+- ``ingredient_vocab`` gives every distinct name an integer id.
+- ``ingredient_suffixes`` maps each name's trailing word runs to its id
+  ("basmati rice" -> "basmati rice", "rice").
+- ``recipe_ingredients`` is the posting list, (ingredient_id, recipe_id).
+- ``recipe_ingredient_sets`` keeps each recipe's sorted ingredient ids as a
+  packed uint32 array.
+
+Queries look terms up in ``ingredient_suffixes``, fetch postings through the
+primary key and intersect or count them with numpy, so they never scan
+ingredient text or the vocabulary. A query term also matches longer names
+ending in it ("rice" finds "basmati rice", not "rice flour").
+"""
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+from app_modules.db import connection
+from app_modules.dedup import STOP_WORDS, normalize_text
+from app_modules.instrumentation import timed
+
+PANTRY_LIMIT = 20
+
+_QUANTITY = re.compile(r"^[\d/.,½¼¾⅓⅔⅛-]+[^\W\d_]{0,3}$")
+_PUNCTUATION = ".,;:!?()[]{}\"'*•–—-"
+
+
+def parse_ingredients(text):
+    """Normalized ingredient names in ``text``, in order, without repeats."""
+    if not isinstance(text, str):
+        return []
+    lines = [line for line in re.split(r"[\r\n;]+", text) if line.strip()]
+    names = []
+    for line in lines:
+        # A lone line is usually a comma list; otherwise text after a comma is a note
+        parts = line.split(",") if len(lines) == 1 else line.split(",")[:1]
+        for part in parts:
+            part = re.sub(r"\(.*?\)", " ", normalize_text(part))
+            words = [word.strip(_PUNCTUATION) for word in part.split()]
+            name = " ".join(
+                word for word in words
+                if word and word not in STOP_WORDS and not _QUANTITY.match(word)
+            )
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def init_schema(c):
+    indexed = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipe_ingredient_sets'"
+    ).fetchone()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS ingredient_vocab (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            recipe_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS recipe_ingredients (
+            ingredient_id INTEGER NOT NULL,
+            recipe_id INTEGER NOT NULL,
+            PRIMARY KEY (ingredient_id, recipe_id)
+        ) WITHOUT ROWID
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recipe_ingredients_recipe
+        ON recipe_ingredients(recipe_id)
+    """)
+    index_suffixes(c)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS recipe_ingredient_sets (
+            recipe_id INTEGER PRIMARY KEY,
+            ingredient_ids BLOB NOT NULL,
+            ingredient_count INTEGER NOT NULL,
+            FOREIGN KEY(recipe_id) REFERENCES recipes(id) ON DELETE CASCADE
+        )
+    """)
+
+    triggers = {
+        "ingredient_postings_ai": (
+            "AFTER INSERT ON recipe_ingredients",
+            "UPDATE ingredient_vocab SET recipe_count = recipe_count + 1 WHERE id = new.ingredient_id;",
+        ),
+        "ingredient_postings_ad": (
+            "AFTER DELETE ON recipe_ingredients",
+            "UPDATE ingredient_vocab SET recipe_count = recipe_count - 1 WHERE id = old.ingredient_id;",
+        ),
+        "ingredient_recipes_ad": (
+            "AFTER DELETE ON recipes",
+            """
+            DELETE FROM recipe_ingredients WHERE recipe_id = old.id;
+            DELETE FROM recipe_ingredient_sets WHERE recipe_id = old.id;
+            """,
+        ),
+        # The text can't be re-parsed in SQL; drop the stale postings until
+        # index_recipe() runs again for this row
+        "ingredient_recipes_au": (
+            "AFTER UPDATE OF ingredients ON recipes",
+            """
+            DELETE FROM recipe_ingredients WHERE recipe_id = old.id;
+            DELETE FROM recipe_ingredient_sets WHERE recipe_id = old.id;
+            """,
+        ),
+    }
+    for name, (event, body) in triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+    if not indexed:
+        for recipe_id, ingredients in c.execute("SELECT id, ingredients FROM recipes").fetchall():
+            index_recipe(c, recipe_id, ingredients)
+
+
+def _suffixes(name):
+    """``name`` and each run of its trailing words: "a b c" -> "a b c", "b c", "c"."""
+    words = name.split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+def _add_suffixes(c, vocab):
+    c.executemany(
+        "INSERT OR IGNORE INTO ingredient_suffixes (suffix, ingredient_id) VALUES (?, ?)",
+        [(suffix, ingredient_id) for ingredient_id, name in vocab for suffix in _suffixes(name)],
+    )
+
+
+def index_suffixes(c):
+    """Create ``ingredient_suffixes`` and fill it for the existing vocabulary."""
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS ingredient_suffixes (
+            suffix TEXT NOT NULL,
+            ingredient_id INTEGER NOT NULL,
+            PRIMARY KEY (suffix, ingredient_id)
+        ) WITHOUT ROWID
+    """)
+    _add_suffixes(c, c.execute("""
+        SELECT v.id, v.name FROM ingredient_vocab v
+        WHERE NOT EXISTS (
+            SELECT 1 FROM ingredient_suffixes s WHERE s.suffix = v.name AND s.ingredient_id = v.id
+        )
+    """).fetchall())
+
+
+def index_recipe(c, recipe_id, ingredients):
+    """Parse one recipe's ingredients into the vocabulary and posting lists."""
+    names = parse_ingredients(ingredients)
+    c.execute("DELETE FROM recipe_ingredients WHERE recipe_id = ?", (recipe_id,))
+    if not names:
+        c.execute("DELETE FROM recipe_ingredient_sets WHERE recipe_id = ?", (recipe_id,))
+        return
+    new_names = [
+        row[0] for row in c.execute("""
+            SELECT value FROM json_each(?)
+            WHERE value NOT IN (SELECT name FROM ingredient_vocab)
+        """, (json.dumps(names),))
+    ]
+    c.executemany("INSERT OR IGNORE INTO ingredient_vocab (name) VALUES (?)", [(n,) for n in new_names])
+    vocab = c.execute(
+        "SELECT id, name FROM ingredient_vocab WHERE name IN (SELECT value FROM json_each(?))",
+        (json.dumps(names),),
+    ).fetchall()
+    _add_suffixes(c, [(ingredient_id, name) for ingredient_id, name in vocab if name in new_names])
+    ids = sorted(ingredient_id for ingredient_id, _ in vocab)
+    c.executemany(
+        "INSERT INTO recipe_ingredients (ingredient_id, recipe_id) VALUES (?, ?)",
+        [(ingredient_id, recipe_id) for ingredient_id in ids],
+    )
+    c.execute("""
+        INSERT OR REPLACE INTO recipe_ingredient_sets (recipe_id, ingredient_ids, ingredient_count)
+        VALUES (?, ?, ?)
+    """, (recipe_id, np.asarray(ids, dtype="<u4").tobytes(), len(ids)))
+
+
+def _expand(conn, terms):
+    """For each parsed term, the vocab ids it matches (exact or as trailing words)."""
+    groups = []
+    for term in terms:
+        rows = conn.execute(
+            "SELECT ingredient_id FROM ingredient_suffixes WHERE suffix = ?", (term,)
+        ).fetchall()
+        groups.append((term, np.asarray(sorted(row[0] for row in rows), dtype=np.int64)))
+    return groups
+
+
+def _names(conn, ingredient_ids):
+    """``{id: name}`` for ``ingredient_ids``."""
+    return dict(conn.execute(
+        "SELECT id, name FROM ingredient_vocab WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps([int(i) for i in ingredient_ids]),),
+    ).fetchall())
+
+
+def _postings(conn, ingredient_ids):
+    """(ingredient_ids, recipe_ids) arrays for every posting of ``ingredient_ids``."""
+    if len(ingredient_ids) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    rows = conn.execute("""
+        SELECT ingredient_id, recipe_id FROM recipe_ingredients
+        WHERE ingredient_id IN (SELECT value FROM json_each(?))
+    """, (json.dumps([int(i) for i in ingredient_ids]),)).fetchall()
+    pairs = np.asarray(rows, dtype=np.int64).reshape(-1, 2)
+    return pairs[:, 0], pairs[:, 1]
+
+
+@timed()
+def recipes_with_all(terms):
+    """Sorted recipe ids whose ingredients include every term in ``terms``."""
+    terms = parse_ingredients(terms if isinstance(terms, str) else "\n".join(terms))
+    if not terms:
+        return []
+    with connection() as conn:
+        groups = _expand(conn, terms)
+        if any(len(ids) == 0 for _, ids in groups):
+            return []
+        owners, recipes = _postings(conn, np.concatenate([ids for _, ids in groups]))
+    result = None
+    # Smallest posting set first keeps every intersection small
+    per_term = sorted(
+        (np.unique(recipes[np.isin(owners, ids)]) for _, ids in groups), key=len
+    )
+    for recipe_ids in per_term:
+        result = recipe_ids if result is None else np.intersect1d(result, recipe_ids, assume_unique=True)
+        if len(result) == 0:
+            break
+    return result.tolist()
+
+
+@timed()
+def match_pantry(pantry, limit=PANTRY_LIMIT, min_matched=1):
+    """Recipes ranked by how much of their ingredient list ``pantry`` covers.
+
+    Returns a DataFrame of id, dish_name, matched, ingredient_count, coverage
+    and missing (names of the ingredients still needed).
+    """
+    terms = parse_ingredients(pantry)
+    columns = ["id", "dish_name", "matched", "ingredient_count", "coverage", "missing"]
+    if not terms:
+        return pd.DataFrame(columns=columns)
+    with connection() as conn:
+        pantry_ids = np.unique(np.concatenate([ids for _, ids in _expand(conn, terms)]))
+        _, recipes = _postings(conn, pantry_ids)
+        if len(recipes) == 0:
+            return pd.DataFrame(columns=columns)
+
+        # Each (ingredient, recipe) posting is unique, so counts are matched ingredients
+        candidates, matched = np.unique(recipes, return_counts=True)
+        keep = matched >= min_matched
+        candidates, matched = candidates[keep], matched[keep]
+        rows = conn.execute("""
+            SELECT s.recipe_id, s.ingredient_count, s.ingredient_ids, r.dish_name
+            FROM recipe_ingredient_sets s
+            JOIN recipes r ON r.id = s.recipe_id
+            WHERE s.recipe_id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(candidates.tolist()),)).fetchall()
+
+    info = {row[0]: row[1:] for row in rows}
+    totals = np.asarray([info.get(int(i), (0,))[0] for i in candidates], dtype=np.int64)
+    present = totals > 0
+    candidates, matched, totals = candidates[present], matched[present], totals[present]
+    coverage = matched / totals
+    # Best coverage first, then fewest missing, then most matched
+    order = np.lexsort((-matched, totals - matched, -coverage))[:limit]
+
+    missing = {
+        int(candidates[i]): np.setdiff1d(
+            np.frombuffer(info[int(candidates[i])][1], dtype="<u4"), pantry_ids, assume_unique=True
+        )
+        for i in order
+    }
+    with connection() as conn:
+        names = _names(conn, np.unique(np.concatenate([[], *missing.values()])))
+
+    results = []
+    for i in order:
+        recipe_id = int(candidates[i])
+        dish_name = info[recipe_id][2]
+        results.append((
+            recipe_id, dish_name, int(matched[i]), int(totals[i]), float(coverage[i]),
+            [names.get(int(ingredient_id), "?") for ingredient_id in missing[recipe_id]],
+        ))
+    return pd.DataFrame(results, columns=columns)
@@ -0,0 +1,195 @@
+"""Per-rerun timing, SQL query and row counts for storage and render paths.
+
+Wrap storage functions with ``@timed()`` and page sections with
+``section(name)``. Between ``start_rerun()`` and ``finish_rerun()`` every
+span records wall time, the SQL statements executed on pooled connections
+(via the sqlite3 trace hook, installed only while a report is active) and
+rows returned. Finished reruns feed process-wide histograms, cumulative since
+the process started, that can be exported in Prometheus text format to the
+file named by ``RNR_METRICS_FILE``.
+"""
+import functools
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+METRICS_FILE = os.environ.get("RNR_METRICS_FILE")
+EXPORT_INTERVAL = 10.0
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+_histograms = {}
+_histograms_lock = threading.Lock()
+_last_export = 0.0
+
+
+class RerunReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.rows = 0
+        self.spans = {}
+        self.total_ms = None
+
+    def record(self, name, elapsed_ms, queries, rows):
+        span = self.spans.setdefault(name, {"calls": 0, "total_ms": 0.0, "queries": 0, "rows": 0})
+        span["calls"] += 1
+        span["total_ms"] += elapsed_ms
+        span["queries"] += queries
+        span["rows"] += rows
+
+    def as_frame(self):
+        frame = pd.DataFrame.from_dict(self.spans, orient="index")
+        if frame.empty:
+            return frame
+        frame.index.name = "span"
+        frame["total_ms"] = frame["total_ms"].round(2)
+        return frame.sort_values("total_ms", ascending=False)
+
+
+def current():
+    return getattr(_local, "report", None)
+
+
+def start_rerun():
+    _local.report = RerunReport()
+    _local.depth = 0
+    return _local.report
+
+
+def on_statement(statement):
+    """sqlite3 trace callback: count statements run by the current thread."""
+    report = current()
+    # Trigger bodies are traced as "-- TRIGGER name"; they are not extra round trips
+    if report is not None and not statement.startswith("--"):
+        report.queries += 1
+
+
+def _row_count(result):
+    if isinstance(result, (pd.DataFrame, list)):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], (pd.DataFrame, list)):
+        return len(result[0])
+    if isinstance(result, dict) and result and all(isinstance(v, list) for v in result.values()):
+        return sum(len(v) for v in result.values())
+    return 0
+
+
+@contextmanager
+def section(name):
+    """Time a block (e.g. a page section) within the current rerun."""
+    report = current()
+    if report is None:
+        yield
+        return
+    queries_before, rows_before = report.queries, report.rows
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        report.record(name, elapsed, report.queries - queries_before, report.rows - rows_before)
+
+
+def timed(name=None, rows=True):
+    """Decorator recording a function as a span named ``name`` (default: module.func).
+
+    With ``rows=True`` the length of the returned list/DataFrame is added to
+    the rerun's rows-fetched count; render functions pass ``rows=False``.
+    """
+    def decorator(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            report = current()
+            if report is None:
+                return fn(*args, **kwargs)
+            if not rows:
+                with section(span_name):
+                    return fn(*args, **kwargs)
+
+            depth = getattr(_local, "depth", 0)
+            with section(span_name):
+                _local.depth = depth + 1
+                try:
+                    result = fn(*args, **kwargs)
+                finally:
+                    _local.depth = depth
+                # Only the outermost storage call counts its rows, so nested
+                # helpers don't double count
+                if depth == 0:
+                    report.rows += _row_count(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def finish_rerun():
+    """Close the current rerun's report and fold it into the histograms."""
+    report = current()
+    if report is None:
+        return None
+    report.total_ms = (time.perf_counter() - report.started) * 1000
+    with _histograms_lock:
+        _observe("rerun", report.total_ms, report.queries)
+        for name, span in report.spans.items():
+            _observe(name, span["total_ms"], span["queries"])
+    _local.report = None
+    maybe_export()
+    return report
+
+
+def _observe(name, elapsed_ms, queries):
+    hist = _histograms.setdefault(name, {
+        "buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0, "queries": 0,
+    })
+    seconds = elapsed_ms / 1000
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            hist["buckets"][i] += 1
+    hist["count"] += 1
+    hist["sum"] += seconds
+    hist["queries"] += queries
+
+
+def prometheus_text():
+    lines = [
+        "# HELP rnr_span_duration_seconds Wall time per span per rerun.",
+        "# TYPE rnr_span_duration_seconds histogram",
+    ]
+    with _histograms_lock:
+        snapshot = {name: dict(hist, buckets=list(hist["buckets"])) for name, hist in _histograms.items()}
+    for name, hist in sorted(snapshot.items()):
+        for bound, count in zip(BUCKETS, hist["buckets"]):
+            lines.append(f'rnr_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+        lines.append(f'rnr_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {hist["count"]}')
+        lines.append(f'rnr_span_duration_seconds_sum{{span="{name}"}} {hist["sum"]:.6f}')
+        lines.append(f'rnr_span_duration_seconds_count{{span="{name}"}} {hist["count"]}')
+    lines.append("# HELP rnr_span_queries_total SQL statements executed per span.")
+    lines.append("# TYPE rnr_span_queries_total counter")
+    for name, hist in sorted(snapshot.items()):
+        lines.append(f'rnr_span_queries_total{{span="{name}"}} {hist["queries"]}')
+    return "\n".join(lines) + "\n"
+
+
+def maybe_export(force=False):
+    """Rewrite METRICS_FILE at most every EXPORT_INTERVAL seconds."""
+    global _last_export
+    if not METRICS_FILE:
+        return
+    now = time.monotonic()
+    if not force and now - _last_export < EXPORT_INTERVAL:
+        return
+    _last_export = now
+    directory = os.path.dirname(METRICS_FILE) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, METRICS_FILE)
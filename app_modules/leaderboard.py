@@ -0,0 +1,182 @@
+"""Trigger-maintained rating summaries and top-K leaderboards.
+
+``recipe_ratings`` holds one row per commented recipe: counts, sum, average,
+a 1-5 star histogram, a Bayesian score and the recipe's category, country
+and language. Triggers on ``comments`` keep it current and triggers on
+``recipes`` keep the copied fields in sync, so every leaderboard query is a
+walk down one index that stops after K rows.
+
+The Bayesian score shrinks each average toward ``PRIOR_MEAN`` as if the
+recipe had ``PRIOR_WEIGHT`` extra ratings, so a single 5-star review can't
+outrank a dish with dozens of 4.8s.
+"""
+import pandas as pd
+
+from app_modules.db import connection
+from app_modules.instrumentation import timed
+
+PRIOR_MEAN = 3.0
+PRIOR_WEIGHT = 5
+
+SCORES = {
+    "bayes": "rr.bayes_score DESC, rr.rating_count DESC",
+    "avg": "rr.avg_rating DESC, rr.rating_count DESC",
+}
+GROUPS = ["category", "country", "language"]
+
+SUMMARY_COLUMNS = {
+    "category": "TEXT",
+    "country": "TEXT",
+    "language": "TEXT",
+    "bayes_score": "REAL",
+}
+
+_SCORE_UPDATE = f"""
+    UPDATE recipe_ratings SET
+        avg_rating = CASE WHEN rating_count > 0 THEN rating_sum * 1.0 / rating_count END,
+        bayes_score = ({PRIOR_WEIGHT} * {PRIOR_MEAN} + rating_sum) * 1.0 / ({PRIOR_WEIGHT} + rating_count)
+    WHERE recipe_id = {{ref}}.recipe_id;
+"""
+
+_DROP_EMPTY = """
+    DELETE FROM recipe_ratings WHERE recipe_id = {ref}.recipe_id AND comment_count = 0;
+"""
+
+
+def _apply(ref, sign):
+    """Trigger body adding (sign=+) or removing (sign=-) one comment row."""
+    stars = ",\n".join(
+        f"stars_{n} = stars_{n} {sign} ({ref}.rating IS {n})" for n in range(1, 6)
+    )
+    return f"""
+        UPDATE recipe_ratings SET
+            comment_count = comment_count {sign} 1,
+            rating_sum = rating_sum {sign} COALESCE({ref}.rating, 0),
+            rating_count = rating_count {sign} ({ref}.rating IS NOT NULL),
+            {stars}
+        WHERE recipe_id = {ref}.recipe_id;
+        {_SCORE_UPDATE.format(ref=ref)}
+        {_DROP_EMPTY.format(ref=ref) if sign == "-" else ""}
+    """
+
+
+_ENSURE_ROW = """
+    INSERT OR IGNORE INTO recipe_ratings (recipe_id, category, country, language)
+    SELECT id, category, country, language FROM recipes WHERE id = new.recipe_id;
+"""
+
+
+def init_schema(c):
+    table_exists = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipe_ratings'"
+    ).fetchone()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS recipe_ratings (
+            recipe_id INTEGER PRIMARY KEY,
+            comment_count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            rating_count INTEGER NOT NULL DEFAULT 0,
+            avg_rating REAL,
+            stars_1 INTEGER NOT NULL DEFAULT 0,
+            stars_2 INTEGER NOT NULL DEFAULT 0,
+            stars_3 INTEGER NOT NULL DEFAULT 0,
+            stars_4 INTEGER NOT NULL DEFAULT 0,
+            stars_5 INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(recipe_id) REFERENCES recipes(id)
+        )
+    """)
+
+    # Auto-upgrade check for leaderboard columns
+    c.execute("PRAGMA table_info(recipe_ratings)")
+    cols = [col[1] for col in c.fetchall()]
+    added = False
+    for column, kind in SUMMARY_COLUMNS.items():
+        if column not in cols:
+            c.execute(f"ALTER TABLE recipe_ratings ADD COLUMN {column} {kind}")
+            added = True
+
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ratings_bayes ON recipe_ratings(bayes_score DESC, rating_count DESC)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_ratings_avg ON recipe_ratings(avg_rating DESC, rating_count DESC)")
+    for group in GROUPS:
+        c.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_ratings_{group}_bayes
+            ON recipe_ratings({group}, bayes_score DESC, rating_count DESC)
+        """)
+        c.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_ratings_{group}_avg
+            ON recipe_ratings({group}, avg_rating DESC, rating_count DESC)
+        """)
+
+    triggers = {
+        "ratings_comment_ai": (
+            "AFTER INSERT ON comments WHEN new.recipe_id IS NOT NULL",
+            _ENSURE_ROW + _apply("new", "+"),
+        ),
+        "ratings_comment_ad": (
+            "AFTER DELETE ON comments WHEN old.recipe_id IS NOT NULL",
+            _apply("old", "-"),
+        ),
+        "ratings_comment_au": (
+            "AFTER UPDATE OF rating, recipe_id ON comments",
+            _apply("old", "-") + _ENSURE_ROW + _apply("new", "+"),
+        ),
+        "ratings_recipe_au": (
+            "AFTER UPDATE OF category, country, language ON recipes",
+            """
+            UPDATE recipe_ratings
+            SET category = new.category, country = new.country, language = new.language
+            WHERE recipe_id = new.id;
+            """,
+        ),
+        "ratings_recipe_ad": (
+            "AFTER DELETE ON recipes",
+            "DELETE FROM recipe_ratings WHERE recipe_id = old.id;",
+        ),
+    }
+    for name, (event, body) in triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+    if not table_exists or added:
+        rebuild(c)
+
+
+def rebuild(c):
+    """Recompute every summary row from comments (repair / after schema changes)."""
+    c.execute("DELETE FROM recipe_ratings")
+    c.execute(f"""
+        INSERT INTO recipe_ratings (recipe_id, comment_count, rating_sum, rating_count,
+            avg_rating, stars_1, stars_2, stars_3, stars_4, stars_5,
+            category, country, language, bayes_score)
+        SELECT c.recipe_id, COUNT(*), COALESCE(SUM(c.rating), 0), COUNT(c.rating), AVG(c.rating),
+            COALESCE(SUM(c.rating = 1), 0), COALESCE(SUM(c.rating = 2), 0),
+            COALESCE(SUM(c.rating = 3), 0), COALESCE(SUM(c.rating = 4), 0),
+            COALESCE(SUM(c.rating = 5), 0),
+            r.category, r.country, r.language,
+            ({PRIOR_WEIGHT} * {PRIOR_MEAN} + COALESCE(SUM(c.rating), 0)) * 1.0
+                / ({PRIOR_WEIGHT} + COUNT(c.rating))
+        FROM comments c
+        JOIN recipes r ON r.id = c.recipe_id
+        GROUP BY c.recipe_id
+    """)
+
+
+@timed()
+def top_rated(k=10, score="bayes", category=None, country=None, language=None, min_ratings=1):
+    """Top ``k`` recipes by ``score`` ("bayes" or "avg"), optionally within one group."""
+    order = SCORES[score]
+    where, params = ["rr.rating_count >= ?"], [min_ratings]
+    for group, value in (("category", category), ("country", country), ("language", language)):
+        if value is not None:
+            where.append(f"rr.{group} = ?")
+            params.append(value)
+    params.append(k)
+    with connection() as conn:
+        return pd.read_sql_query(f"""
+            SELECT r.id, r.dish_name, r.name, rr.category, rr.country, rr.language,
+                rr.avg_rating, rr.rating_count, rr.bayes_score
+            FROM recipe_ratings rr
+            JOIN recipes r ON r.id = rr.recipe_id
+            WHERE {" AND ".join(where)}
+            ORDER BY {order}
+            LIMIT ?
+        """, conn, params=params)
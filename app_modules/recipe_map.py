@@ -0,0 +1,147 @@
+"""Pre-aggregated Recipe Map points.
+
+Recipes are geocoded to their country's centroid, so thousands of rows land
+on a handful of coordinates. ``map_locations`` keeps one row per distinct
+(rounded) coordinate with its recipe count; triggers on ``recipes`` update it
+as rows are inserted, geocoded, moved or deleted. The map reads this table,
+so its payload grows with the number of places, not the number of recipes.
+A location is labelled with the smallest country name among its recipes.
+"""
+import math
+
+import pandas as pd
+
+from app_modules.db import connection
+from app_modules.instrumentation import timed
+
+# ~11 m; merges float noise from different geocoder runs for the same place
+PRECISION = 4
+SAMPLE_DISHES = 3
+
+
+def _key(ref=""):
+    return f"ROUND({ref}latitude, {PRECISION}), ROUND({ref}longitude, {PRECISION})"
+
+
+def init_schema(c):
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'map_locations'")
+    exists = c.fetchone() is not None
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS map_locations (
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            country TEXT,
+            recipe_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (latitude, longitude)
+        ) WITHOUT ROWID
+    """)
+    # Sample-dish lookup per location, and the rows the geocoder still has to fill
+    c.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_recipes_location
+        ON recipes({_key()})
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recipes_unlocated
+        ON recipes(country) WHERE latitude IS NULL
+    """)
+
+    _create_triggers(c)
+
+    if not exists:
+        rebuild(c)
+
+
+def _create_triggers(c):
+    add = f"""
+        INSERT INTO map_locations (latitude, longitude, country, recipe_count)
+        SELECT {_key("NEW.")}, NEW.country, 1
+        WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL
+        ON CONFLICT(latitude, longitude) DO UPDATE SET
+            recipe_count = recipe_count + 1,
+            country = COALESCE(MIN(country, excluded.country), country, excluded.country);
+    """
+    # Only losing the recipe that supplied the label means looking the label up again
+    remove = f"""
+        UPDATE map_locations SET recipe_count = recipe_count - 1
+        WHERE (latitude, longitude) = ({_key("OLD.")});
+        DELETE FROM map_locations
+        WHERE (latitude, longitude) = ({_key("OLD.")}) AND recipe_count <= 0;
+        UPDATE map_locations SET country = (
+            SELECT MIN(r.country) FROM recipes r
+            WHERE ({_key("r.")}) = (map_locations.latitude, map_locations.longitude)
+        )
+        WHERE (latitude, longitude) = ({_key("OLD.")}) AND country = OLD.country;
+    """
+    triggers = [
+        ("map_recipes_ai", "AFTER INSERT ON recipes", add),
+        ("map_recipes_au", "AFTER UPDATE OF latitude, longitude, country ON recipes", remove + add),
+        ("map_recipes_ad", "AFTER DELETE ON recipes", remove),
+    ]
+    for name, event, body in triggers:
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+
+
+def relabel(c):
+    """Replace the map triggers with ones that also follow country edits, then rebuild."""
+    for name in ("map_recipes_ai", "map_recipes_au", "map_recipes_ad"):
+        c.execute(f"DROP TRIGGER IF EXISTS {name}")
+    _create_triggers(c)
+    rebuild(c)
+
+
+def rebuild(c):
+    """Recompute map_locations from scratch (first run, or after bulk edits)."""
+    c.execute("DELETE FROM map_locations")
+    c.execute(f"""
+        INSERT INTO map_locations (latitude, longitude, country, recipe_count)
+        SELECT {_key("r.")}, MIN(r.country), COUNT(*)
+        FROM recipes r
+        WHERE r.latitude IS NOT NULL AND r.longitude IS NOT NULL
+        GROUP BY 1, 2
+    """)
+
+
+@timed()
+def get_locations(grid=None):
+    """One row per map location: latitude, longitude, country, recipe_count, dishes.
+
+    With ``grid`` (degrees), nearby locations are merged into one marker per
+    grid cell, placed at the count-weighted centre.
+    """
+    with connection() as conn:
+        points = pd.read_sql_query(f"""
+            SELECT m.latitude, m.longitude, m.country, m.recipe_count,
+                (SELECT group_concat(dish_name, ', ') FROM (
+                    SELECT r.dish_name FROM recipes r
+                    WHERE ({_key("r.")}) = (m.latitude, m.longitude)
+                    ORDER BY r.id DESC
+                    LIMIT {SAMPLE_DISHES}
+                )) AS dishes
+            FROM map_locations m
+            ORDER BY m.recipe_count DESC
+        """, conn)
+    if grid is None or points.empty:
+        return points
+
+    points["_cell_lat"] = (points["latitude"] // grid).astype(int)
+    points["_cell_lon"] = (points["longitude"] // grid).astype(int)
+    points["_w_lat"] = points["latitude"] * points["recipe_count"]
+    points["_w_lon"] = points["longitude"] * points["recipe_count"]
+    # Rows are sorted by count, so "first" picks the biggest place in each cell
+    cells = points.groupby(["_cell_lat", "_cell_lon"], sort=False).agg(
+        recipe_count=("recipe_count", "sum"),
+        _w_lat=("_w_lat", "sum"),
+        _w_lon=("_w_lon", "sum"),
+        country=("country", lambda names: ", ".join(names.dropna())),
+        dishes=("dishes", "first"),
+    )
+    cells["latitude"] = cells["_w_lat"] / cells["recipe_count"]
+    cells["longitude"] = cells["_w_lon"] / cells["recipe_count"]
+    return cells.reset_index()[
+        ["latitude", "longitude", "country", "recipe_count", "dishes"]
+    ].sort_values("recipe_count", ascending=False, ignore_index=True)
+
+
+def marker_radius(counts, base_m=40_000):
+    """Marker radius in metres; area grows with recipe count."""
+    return [base_m * math.sqrt(count) for count in counts]
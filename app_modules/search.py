@@ -0,0 +1,226 @@
+"""Full-text recipe search backed by SQLite FTS5.
+
+Two external-content indexes mirror the searchable ``recipes`` columns and
+are kept in sync by triggers:
+
+- ``recipes_fts`` uses unicode61 (with combining marks kept inside tokens so
+  Indic and other native-script dish names stay whole) and prefix indexes.
+- ``recipes_fts_trigram`` uses the trigram tokenizer for substring matches,
+  when the linked SQLite supports it (3.34+).
+"""
+import json
+import sqlite3
+
+from app_modules import db
+from app_modules.db import connection
+from app_modules.instrumentation import timed
+
+FTS_COLUMNS = ["dish_name", "ingredients", "instructions", "story", "country"]
+# bm25 column weights, in FTS_COLUMNS order
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 1.0, 2.0)
+
+UNICODE_TOKENIZER = "unicode61 remove_diacritics 2 categories 'L* N* Co M*'"
+MIN_TRIGRAM_TERM = 3
+SUGGEST_LIMIT = 20
+# Above this many hits, sorted result pages probe the index row by row
+SORTED_SEARCH_CANDIDATES = 20000
+
+_trigram_supported = None
+# DB_FILE -> True once recipes_fts_trigram is known to exist
+_trigram_index = {}
+
+
+def _supports_trigram(c):
+    global _trigram_supported
+    if _trigram_supported is None:
+        try:
+            c.execute("CREATE VIRTUAL TABLE temp._trigram_probe USING fts5(x, tokenize='trigram')")
+            c.execute("DROP TABLE temp._trigram_probe")
+            _trigram_supported = True
+        except sqlite3.OperationalError:
+            _trigram_supported = False
+    return _trigram_supported
+
+
+def _table_exists(c, name):
+    return c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+
+def _has_trigram_index(conn):
+    """Whether this database has the trigram index, looked up on first use.
+
+    The schema may have been built by another process, so this can't rely on
+    ``init_schema`` having run here.
+    """
+    if db.DB_FILE not in _trigram_index:
+        if not _table_exists(conn, "recipes_fts_trigram"):
+            return False
+        _trigram_index[db.DB_FILE] = True
+    return True
+
+
+def _use_trigram(conn, terms):
+    return all(len(t) >= MIN_TRIGRAM_TERM for t in terms) and _has_trigram_index(conn)
+
+
+def _create_index(c, table, tokenize, prefix=None):
+    created = not _table_exists(c, table)
+    cols = ", ".join(FTS_COLUMNS)
+    new_cols = ", ".join(f"new.{col}" for col in FTS_COLUMNS)
+    old_cols = ", ".join(f"old.{col}" for col in FTS_COLUMNS)
+    options = f"content='recipes', content_rowid='id', tokenize=\"{tokenize}\""
+    if prefix:
+        options += f", prefix='{prefix}'"
+
+    c.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({cols}, {options})")
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON recipes BEGIN
+            INSERT INTO {table}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON recipes BEGIN
+            INSERT INTO {table}({table}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END
+    """)
+    c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {cols} ON recipes BEGIN
+            INSERT INTO {table}({table}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO {table}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END
+    """)
+    if created:
+        # Index rows that existed before the FTS table did.
+        c.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+
+def init_schema(c):
+    _create_index(c, "recipes_fts", UNICODE_TOKENIZER, prefix="2 3")
+    if _supports_trigram(c):
+        _create_index(c, "recipes_fts_trigram", "trigram")
+    # Case-insensitive dish name prefix lookups for the typeahead picker
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recipes_dish_nocase
+        ON recipes(dish_name COLLATE NOCASE, id)
+    """)
+
+
+def _terms(query):
+    return [term.replace('"', "") for term in query.split() if term.replace('"', "")]
+
+
+def build_match(query, prefix=True):
+    """Turn free text into an FTS5 MATCH expression (implicit AND of terms)."""
+    suffix = " *" if prefix else ""
+    return " ".join(f'"{term}"{suffix}' for term in _terms(query))
+
+
+@timed()
+def search_recipe_ids(query, limit=None, offset=0):
+    """Return recipe ids matching ``query``, best bm25 rank first.
+
+    Queries whose terms are all at least three characters use the trigram
+    index (substring semantics); shorter terms fall back to unicode61
+    prefix matching.
+    """
+    terms = _terms(query or "")
+    if not terms:
+        return []
+
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    try:
+        with connection() as conn:
+            use_trigram = _use_trigram(conn, terms)
+            table = "recipes_fts_trigram" if use_trigram else "recipes_fts"
+            rows = conn.execute(f"""
+                SELECT rowid FROM {table}
+                WHERE {table} MATCH ?
+                ORDER BY bm25({table}, {weights})
+                LIMIT ? OFFSET ?
+            """, (
+                build_match(query, prefix=not use_trigram),
+                -1 if limit is None else limit, offset,
+            )).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    return [row[0] for row in rows]
+
+
+def hit_filter(conn, query, column="r.id"):
+    """SQL condition restricting ``column`` to recipes matching ``query``.
+
+    Returns ``(sql, params)`` for a caller that sorts and pages by its own
+    key. Up to ``SORTED_SEARCH_CANDIDATES`` hits are passed as an id list, so
+    only those rows are sorted. Broader queries become a per-row probe of the
+    FTS index instead: the caller walks its sort index and stops at LIMIT,
+    which takes about page size / hit ratio probes. Cost grows with the hit
+    count up to the threshold and is bounded by the probes past it.
+    """
+    terms = _terms(query or "")
+    if not terms:
+        return "1", []
+    use_trigram = _use_trigram(conn, terms)
+    table = "recipes_fts_trigram" if use_trigram else "recipes_fts"
+    match = build_match(query, prefix=not use_trigram)
+    try:
+        hits = [row[0] for row in conn.execute(
+            f"SELECT rowid FROM {table} WHERE {table} MATCH ? LIMIT ?",
+            (match, SORTED_SEARCH_CANDIDATES + 1),
+        )]
+    except sqlite3.OperationalError:
+        return "0", []
+    if len(hits) <= SORTED_SEARCH_CANDIDATES:
+        return f"{column} IN (SELECT value FROM json_each(?))", [json.dumps(hits)]
+    return (
+        f"EXISTS (SELECT 1 FROM {table} WHERE {table}.rowid = {column} AND {table} MATCH ?)",
+        [match],
+    )
+
+
+@timed()
+def suggest_dishes(query, limit=SUGGEST_LIMIT):
+    """Return up to ``limit`` (id, dish_name) pairs for a typeahead picker.
+
+    Names starting with ``query`` (ASCII case-insensitive) come first, read
+    off the NOCASE index in name order; substring matches on the dish name
+    from the FTS indexes fill the rest. An empty query lists the first names
+    alphabetically.
+    """
+    query = (query or "").strip()
+    with connection() as conn:
+        if not query:
+            return conn.execute("""
+                SELECT id, dish_name FROM recipes
+                ORDER BY COALESCE(dish_name, ''), id
+                LIMIT ?
+            """, (limit,)).fetchall()
+
+        # U+10FFFF sorts after any character that can follow the prefix
+        matches = conn.execute("""
+            SELECT id, dish_name FROM recipes
+            WHERE dish_name >= ? COLLATE NOCASE AND dish_name < ? COLLATE NOCASE
+            ORDER BY dish_name COLLATE NOCASE, id
+            LIMIT ?
+        """, (query, query + "\U0010ffff", limit)).fetchall()
+        if len(matches) >= limit:
+            return matches
+
+        terms = _terms(query)
+        use_trigram = _use_trigram(conn, terms)
+        table = "recipes_fts_trigram" if use_trigram else "recipes_fts"
+        match = f"dish_name : ({build_match(query, prefix=not use_trigram)})"
+        try:
+            rows = conn.execute(f"""
+                SELECT r.id, r.dish_name FROM {table}
+                JOIN recipes r ON r.id = {table}.rowid
+                WHERE {table} MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            """, (match, limit + len(matches))).fetchall()
+        except sqlite3.OperationalError:
+            rows = []
+    seen = {recipe_id for recipe_id, _ in matches}
+    matches += [row for row in rows if row[0] not in seen]
+    return matches[:limit]
@@ -1,19 +1,28 @@
 import os
+import json
 import datetime
-import sqlite3
 import pandas as pd
-from geopy.geocoders import Nominatim
-
-DB_FILE = "data/recipes.db"
-IMAGE_DIR = "data/images"
+from app_modules.db import connection
+from app_modules import (
+    community_stats, dataset, db, dedup, featured, geocode_worker, geocoding, images,
+    ingredient_index, leaderboard, recipe_map, search, write_queue
+)
+from app_modules.images import IMAGE_DIR
+from app_modules.search import hit_filter
+from app_modules.instrumentation import timed
 
+@timed()
 def init_storage():
+    """Create or upgrade the schema; only the first call per process does any work."""
+    if db.is_migrated():
+        return
     os.makedirs("data", exist_ok=True)
     os.makedirs(IMAGE_DIR, exist_ok=True)
+    # Pending migrations share one transaction, so a failed backfill never
+    # leaves a half-built table
+    db.migrate(MIGRATIONS)
 
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-
+def _create_schema(c):
     # Recipes table
     c.execute("""
         CREATE TABLE IF NOT EXISTS recipes (
@@ -29,7 +38,10 @@ def init_storage():
             image_path TEXT,
             timestamp TEXT,
             latitude REAL,
-            longitude REAL
+            longitude REAL,
+            thumb_path TEXT,
+            image_hash TEXT,
+            dedup_key TEXT
         )
     """)
 
@@ -53,45 +65,178 @@ def init_storage():
         c.execute("ALTER TABLE comments ADD COLUMN rating INTEGER")
         print("🔄 Added missing 'rating' column in comments table")
 
-    # Recipe of the Day table
+    # Auto-upgrade check for image variant and dedup columns (older databases)
+    c.execute("PRAGMA table_info(recipes)")
+    recipe_cols = [col[1] for col in c.fetchall()]
+    for column in ("thumb_path", "image_hash", "dedup_key"):
+        if column not in recipe_cols:
+            c.execute(f"ALTER TABLE recipes ADD COLUMN {column} TEXT")
+            print(f"🔄 Added missing '{column}' column in recipes table")
+
     c.execute("""
-        CREATE TABLE IF NOT EXISTS recipe_of_the_day (
-            id INTEGER PRIMARY KEY CHECK (id = 1),
-            recipe_id INTEGER UNIQUE,
-            taste_description TEXT,
-            date TEXT UNIQUE,
-            FOREIGN KEY(recipe_id) REFERENCES recipes(id)
-        )
+        CREATE INDEX IF NOT EXISTS idx_comments_recipe_ts
+        ON comments(recipe_id, timestamp DESC)
+    """)
+
+    # Keyset pagination indexes, matching the ORDER BY expressions in PAGE_SORTS
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recipes_recent
+        ON recipes(COALESCE(timestamp, ''), id)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_recipes_alpha
+        ON recipes(COALESCE(dish_name, ''), id)
     """)
 
-    conn.commit()
-    conn.close()
+    leaderboard.init_schema(c)
+    community_stats.init_schema(c)
+    dataset.init_schema(c)
+    dedup.init_schema(c)
+    ingredient_index.init_schema(c)
+    featured.init_schema(c)
+    geocoding.init_schema(c)
+    recipe_map.init_schema(c)
+    search.init_schema(c)
+
+# Schema migrations, recorded in PRAGMA user_version. Append a function to
+# change the schema; never edit one that has already shipped. Fresh installs
+# run the baseline and then every later step, so each step must also be a
+# no-op on a schema the current baseline just built.
+MIGRATIONS = [
+    _create_schema,  # 1: baseline; also upgrades databases from before versioning
+    dataset.track_changed_at,  # 2: db_meta.changed_at for API Last-Modified
+    dataset.track_coordinates,  # 3: coordinate fill-ins no longer force a full reload
+    ingredient_index.index_suffixes,  # 4: suffix lookup for ingredient terms
+    recipe_map.relabel,  # 5: map labels follow country edits and deletes
+    community_stats.prune_empty_days,  # 6: stats_daily drops days that reach zero
+]
 
+@timed()
 def load_data():
-    conn = sqlite3.connect(DB_FILE)
-    df = pd.read_sql_query("SELECT * FROM recipes", conn)
-    conn.close()
-    return df
+    # Cached per process; only re-reads what changed since the last call
+    return dataset.load_recipes()
+
+# Recipe list pages
+PAGE_SORTS = {
+    "Most Recent": ("COALESCE(r.timestamp, '')", "DESC"),
+    "Alphabetical": ("COALESCE(r.dish_name, '')", "ASC"),
+}
+
+RECIPE_LIST_SQL = """
+    SELECT r.id, r.name, r.language, r.dish_name, r.category, r.country, r.timestamp,
+        COALESCE(rr.comment_count, 0) AS comment_count,
+        COALESCE(rr.rating_count, 0) AS rating_count,
+        rr.avg_rating
+    FROM recipes r
+    LEFT JOIN recipe_ratings rr ON rr.recipe_id = r.id
+"""
+
+@timed()
+def get_recipe_page(sort="Most Recent", page_size=10, cursor=None, recipe_ids=None, search=None):
+    """Return one page of the recipe list and the cursor for the next page.
+
+    Pagination is keyset based: ``cursor`` is the (sort key, id) of the last
+    row of the previous page, so every page is an index range scan no matter
+    how deep it is. ``recipe_ids`` restricts the list to given ids and
+    ``search`` to full-text matches, filtered in the same query.
+    """
+    key, direction = PAGE_SORTS[sort]
+    comparison = "<" if direction == "DESC" else ">"
+    where, params = [], []
+    if recipe_ids is not None:
+        where.append("r.id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps([int(i) for i in recipe_ids]))
+    if cursor is not None:
+        # Spelled out rather than as a row-value comparison, which SQLite
+        # can't use to seek into the (key, id) index
+        where.append(f"{key} {comparison}= ? AND ({key} {comparison} ? OR r.id {comparison} ?)")
+        params.extend([cursor[0], cursor[0], cursor[1]])
+
+    with connection() as conn:
+        if search:
+            condition, search_params = hit_filter(conn, search)
+            where.append(condition)
+            params.extend(search_params)
+        query = RECIPE_LIST_SQL
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += f" ORDER BY {key} {direction}, r.id {direction} LIMIT ?"
+        params.append(page_size + 1)
+        page = pd.read_sql_query(query, conn, params=params)
+    next_cursor = None
+    if len(page) > page_size:
+        page = page.iloc[:page_size]
+        last = page.iloc[-1]
+        sort_column = "timestamp" if sort == "Most Recent" else "dish_name"
+        sort_value = last[sort_column]
+        next_cursor = ("" if pd.isna(sort_value) else sort_value, int(last["id"]))
+    return page, next_cursor
+
+@timed()
+def get_recipes_by_ids(recipe_ids):
+    """Return recipe list rows for ``recipe_ids``, in the order given."""
+    ids = [int(i) for i in recipe_ids]
+    with connection() as conn:
+        page = pd.read_sql_query(
+            RECIPE_LIST_SQL + " WHERE r.id IN (SELECT value FROM json_each(?))",
+            conn, params=[json.dumps(ids)]
+        )
+    order = {recipe_id: pos for pos, recipe_id in enumerate(ids)}
+    return page.sort_values(by="id", key=lambda col: col.map(order)).reset_index(drop=True)
+
+@timed()
+def get_recipe(recipe_id):
+    """Return the full recipe row (with rating aggregate) as a dict, or None."""
+    with connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT r.*,
+                COALESCE(rr.rating_count, 0) AS rating_count,
+                rr.avg_rating
+            FROM recipes r
+            LEFT JOIN recipe_ratings rr ON rr.recipe_id = r.id
+            WHERE r.id = ?
+        """, conn, params=[int(recipe_id)])
+    return df.iloc[0].to_dict() if not df.empty else None
+
+@timed()
+def get_recipe_detail(recipe_ids):
+    """Heavy text fields for ``recipe_ids`` as ``{id: dict}``, LRU-cached."""
+    return dataset.get_details(recipe_ids)
 
 def save_data(df):
     pass  # no need to save DataFrame directly (DB holds data)
 
-def is_duplicate(df, name, dish):
-    if not name or not dish:
+@timed()
+def is_duplicate(name, dish):
+    key = dedup.recipe_key(name, dish)
+    if key is None:
         return False
-    return not df[
-        (df["dish_name"].str.lower() == dish.lower()) &
-        (df["name"].str.lower() == name.lower())
-    ].empty
+    with connection() as conn:
+        return conn.execute(
+            "SELECT 1 FROM recipes WHERE dedup_key = ?", (key,)
+        ).fetchone() is not None
 
-def add_entry(df, entry):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    lat, lon = get_coordinates(entry.get("country", ""))
-    c.execute("""
+@timed()
+def insert_recipe(entry):
+    """Insert a recipe; returns its id, or None if it duplicates an existing one.
+
+    Coordinates are filled in only if the country is already known; anything
+    else is left to the background geocoder so saving never waits on the network.
+    """
+    coords = geocoding.lookup_cached(entry.get("country", ""))
+    recipe_id = write_queue.write(_insert_recipe, entry, coords)
+    if recipe_id is not None and coords is None:
+        geocode_worker.enqueue(entry.get("country"))
+    return recipe_id
+
+def _insert_recipe(conn, entry, coords):
+    lat, lon = coords if coords is not None else (None, None)
+    cursor = conn.execute("""
         INSERT INTO recipes (name, language, dish_name, category, country,
-            ingredients, instructions, story, image_path, timestamp, latitude, longitude)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ingredients, instructions, story, image_path, thumb_path, image_hash,
+            timestamp, latitude, longitude, dedup_key)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(dedup_key) DO NOTHING
     """, (
         entry.get("name"),
         entry.get("language"),
@@ -102,114 +247,178 @@ def add_entry(df, entry):
         entry.get("instructions"),
         entry.get("story"),
         entry.get("image_path"),
+        entry.get("thumb_path"),
+        entry.get("image_hash"),
         entry.get("timestamp"),
         lat,
-        lon
+        lon,
+        dedup.recipe_key(entry.get("name"), entry.get("dish_name"))
     ))
-    conn.commit()
-    conn.close()
+    if cursor.rowcount == 0:
+        return None
+    recipe_id = cursor.lastrowid
+    dedup.index_recipe(conn, recipe_id, entry.get("ingredients"))
+    ingredient_index.index_recipe(conn, recipe_id, entry.get("ingredients"))
+    return recipe_id
+
+@timed()
+def add_entry(df, entry):
+    insert_recipe(entry)
     return load_data()
 
+@timed()
+def find_similar_recipes(ingredients, exclude_id=None):
+    """Recipes whose ingredient lists look like ``ingredients``: [(id, dish_name, score)]."""
+    with connection() as conn:
+        matches = dedup.find_near_duplicates(conn, ingredients, exclude_id=exclude_id)
+        if not matches:
+            return []
+        names = dict(conn.execute(
+            "SELECT id, dish_name FROM recipes WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps([recipe_id for recipe_id, _ in matches]),)
+        ).fetchall())
+    return [(recipe_id, names.get(recipe_id), score) for recipe_id, score in matches]
+
+def find_recipes_with_ingredients(terms):
+    """Ids of recipes whose ingredient lists include every one of ``terms``."""
+    return ingredient_index.recipes_with_all(terms)
+
+def match_pantry(pantry, limit=20):
+    """Recipes ranked by how much of their ingredient list ``pantry`` covers."""
+    return ingredient_index.match_pantry(pantry, limit)
+
 def get_timestamp():
     return datetime.datetime.now().isoformat()
 
+@timed()
 def get_coordinates(location_name):
     if not location_name or not isinstance(location_name, str):
         return (None, None)
-    try:
-        geolocator = Nominatim(user_agent="roots_and_recipes")
-        location = geolocator.geocode(location_name)
-        if location:
-            return (location.latitude, location.longitude)
-    except Exception:
-        pass
-    return (None, None)
-
-def save_image(image_file, dish_name):
-    os.makedirs(IMAGE_DIR, exist_ok=True)
-    safe_name = dish_name.lower().replace(" ", "_") if dish_name else "image"
-    ext = image_file.name.split(".")[-1]
-    timestamp = int(datetime.datetime.now().timestamp())
-    filename = f"{safe_name}_{timestamp}.{ext}"
-    filepath = os.path.join(IMAGE_DIR, filename)
-    with open(filepath, "wb") as f:
-        f.write(image_file.getbuffer())
-    return filepath
+    return geocoding.geocode(location_name)
+
+def start_geocoder():
+    """Start the background geocoder (once per process) and backfill missing coordinates."""
+    return geocode_worker.start()
+
+def get_map_locations(grid=None):
+    return recipe_map.get_locations(grid)
+
+@timed(rows=False)
+def save_image(image_file):
+    """Store an uploaded image; returns image_path/thumb_path/image_hash for the entry."""
+    return images.store_image(bytes(image_file.getbuffer()))
 
 # Comments with rating
-def add_comment(recipe_id, commenter_name, comment_text, rating=None):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    timestamp = get_timestamp()
-    c.execute("""
+@timed()
+def add_comment(recipe_id, commenter_name, comment_text, rating=None, wait=True):
+    """Store a comment via the group-commit writer; returns its id.
+
+    With ``wait=False`` returns the write's future instead of blocking.
+    """
+    future = write_queue.submit(
+        _insert_comment, recipe_id, commenter_name, comment_text, rating, get_timestamp()
+    )
+    return future.result(write_queue.WRITE_TIMEOUT) if wait else future
+
+def _insert_comment(conn, recipe_id, commenter_name, comment_text, rating, timestamp):
+    # recipe_ratings is kept in step by triggers on comments
+    return conn.execute("""
         INSERT INTO comments (recipe_id, commenter_name, comment_text, rating, timestamp)
         VALUES (?, ?, ?, ?, ?)
-    """, (recipe_id, commenter_name, comment_text, rating, timestamp))
-    conn.commit()
-    conn.close()
+    """, (recipe_id, commenter_name, comment_text, rating, timestamp)).lastrowid
 
+@timed()
 def get_comments(recipe_id):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    c.execute("""
-        SELECT commenter_name, comment_text, rating, timestamp
-        FROM comments
-        WHERE recipe_id = ?
-        ORDER BY timestamp DESC
-    """, (recipe_id,))
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    with connection() as conn:
+        return conn.execute("""
+            SELECT commenter_name, comment_text, rating, timestamp
+            FROM comments
+            WHERE recipe_id = ?
+            ORDER BY timestamp DESC
+        """, (recipe_id,)).fetchall()
+
+@timed()
+def get_comments_for_recipes(recipe_ids, limit_per_recipe=None):
+    """Fetch comments for many recipes in one query.
+
+    Returns {recipe_id: [(commenter_name, comment_text, rating, timestamp), ...]},
+    newest first, with at most ``limit_per_recipe`` comments per recipe.
+    """
+    ids = [int(i) for i in recipe_ids]
+    comments = {recipe_id: [] for recipe_id in ids}
+    if not ids:
+        return comments
+    with connection() as conn:
+        rows = conn.execute("""
+            SELECT recipe_id, commenter_name, comment_text, rating, timestamp
+            FROM (
+                SELECT recipe_id, commenter_name, comment_text, rating, timestamp,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY recipe_id ORDER BY timestamp DESC
+                    ) AS rn
+                FROM comments
+                WHERE recipe_id IN (SELECT value FROM json_each(?))
+            )
+            WHERE ? IS NULL OR rn <= ?
+            ORDER BY recipe_id, rn
+        """, (json.dumps(ids), limit_per_recipe, limit_per_recipe)).fetchall()
+    for recipe_id, *comment in rows:
+        comments[recipe_id].append(tuple(comment))
+    return comments
+
+@timed()
+def get_ratings(recipe_ids):
+    """Return {recipe_id: rating summary dict} from the recipe_ratings aggregate."""
+    ids = [int(i) for i in recipe_ids]
+    with connection() as conn:
+        rows = conn.execute("""
+            SELECT recipe_id, comment_count, rating_sum, rating_count, avg_rating,
+                stars_1, stars_2, stars_3, stars_4, stars_5
+            FROM recipe_ratings
+            WHERE recipe_id IN (SELECT value FROM json_each(?))
+        """, (json.dumps(ids),)).fetchall()
+    keys = ["comment_count", "rating_sum", "rating_count", "avg_rating"]
+    return {
+        row[0]: {**dict(zip(keys, row[1:5])), "histogram": list(row[5:])}
+        for row in rows
+    }
 
 # Top rated recipe
+@timed()
 def get_top_rated_recipe():
-    conn = sqlite3.connect(DB_FILE)
-    query = """
-        SELECT r.*, AVG(c.rating) as avg_rating
-        FROM recipes r
-        JOIN comments c ON r.id = c.recipe_id
-        WHERE c.rating IS NOT NULL
-        GROUP BY r.id
-        ORDER BY avg_rating DESC
-        LIMIT 1
-    """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df.iloc[0] if not df.empty else None
+    top = leaderboard.top_rated(1, score="avg")
+    if top.empty:
+        return None
+    with connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM recipes WHERE id = ?", conn, params=[int(top.iloc[0]["id"])]
+        )
+    df["avg_rating"] = top.iloc[0]["avg_rating"]
+    return df.iloc[0]
+
+@timed()
+def get_top_rated(k=10, score="bayes", category=None, country=None, language=None):
+    return leaderboard.top_rated(k, score=score, category=category, country=country, language=language)
+
+# Community stats
+def get_community_stats():
+    return community_stats.summary()
+
+def get_stats_breakdown(dimension, limit=10):
+    return community_stats.breakdown(dimension, limit)
+
+def get_activity(period="week", since=None):
+    return community_stats.time_series(period, since)
+
+def search_dish_names(query, limit=20):
+    """Typeahead matches as (id, dish_name) pairs, prefix matches first."""
+    return search.suggest_dishes(query, limit)
 
 # Recipe of the Day
+@timed()
 def set_recipe_of_the_day(recipe_id, taste_description):
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    today = datetime.datetime.now().date().isoformat()
-    c.execute("""
-        INSERT INTO recipe_of_the_day (id, recipe_id, taste_description, date)
-        VALUES (1, ?, ?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-            recipe_id=excluded.recipe_id,
-            taste_description=excluded.taste_description,
-            date=excluded.date
-    """, (recipe_id, taste_description, today))
-    conn.commit()
-    conn.close()
+    featured.set_for_date(recipe_id, taste_description)
 
+@timed()
 def get_recipe_of_the_day():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    today = datetime.datetime.now().date().isoformat()
-    c.execute("""
-        SELECT r.id, r.dish_name, r.language, r.category, r.country, r.ingredients,
-            r.instructions, r.story, r.image_path, r.timestamp,
-            rod.taste_description
-        FROM recipe_of_the_day rod
-        JOIN recipes r ON rod.recipe_id = r.id
-        WHERE rod.date = ?
-        LIMIT 1
-    """, (today,))
-    row = c.fetchone()
-    conn.close()
-    if row:
-        keys = ["id", "dish_name", "language", "category", "country", "ingredients",
-                "instructions", "story", "image_path", "timestamp", "taste_description"]
-        return dict(zip(keys, row))
-    return None
+    return featured.get_for_date()
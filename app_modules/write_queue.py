@@ -0,0 +1,169 @@
+"""Group commit for user writes (comments, ratings, new recipes).
+
+Callers ``submit`` a function that takes a connection and get back a
+``concurrent.futures.Future``. One writer thread drains the queue and runs
+everything waiting, up to ``MAX_BATCH`` writes, in a single transaction;
+writes that arrive while a commit is in flight form the next group. A burst
+of comments then costs a few commits and rounds on the SQLite write lock
+instead of one each. ``MAX_DELAY`` holds a group open a little longer for
+stragglers; it is off by default because a lone comment would pay for it.
+
+Each write runs inside its own savepoint, so a failing write rejects only its
+own future. Futures resolve after the commit, so a result means the row is
+stored. When ``QUEUE_SIZE`` writes are already waiting, ``submit`` blocks for
+up to ``SUBMIT_TIMEOUT`` seconds and then raises ``WriteQueueFull``.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from app_modules import dataset
+from app_modules.db import connection
+
+QUEUE_SIZE = 1000
+MAX_BATCH = 200
+MAX_DELAY = 0.0
+SUBMIT_TIMEOUT = 2.0
+WRITE_TIMEOUT = 30.0
+
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_lock = threading.Lock()
+_threads = []
+_stop = threading.Event()
+_stats = {"submitted": 0, "written": 0, "failed": 0, "rejected": 0, "batches": 0, "largest_batch": 0}
+
+
+class WriteQueueFull(Exception):
+    """The writer is too far behind to accept another write right now."""
+
+
+def stats():
+    stats = dict(_stats)
+    stats["pending"] = _queue.qsize()
+    return stats
+
+
+def is_running():
+    return any(thread.is_alive() for thread in _threads)
+
+
+def submit(fn, *args):
+    """Queue ``fn(conn, *args)``; the future resolves to its return value."""
+    start()
+    future = Future()
+    try:
+        _queue.put((fn, args, future), timeout=SUBMIT_TIMEOUT)
+    except queue.Full:
+        _stats["rejected"] += 1
+        raise WriteQueueFull(f"{_queue.qsize()} writes already waiting")
+    _stats["submitted"] += 1
+    return future
+
+
+def write(fn, *args, timeout=WRITE_TIMEOUT):
+    """``submit`` and wait for the commit; re-raises the write's exception."""
+    return submit(fn, *args).result(timeout)
+
+
+def _next_batch():
+    try:
+        batch = [_queue.get(timeout=0.5)]
+    except queue.Empty:
+        return []
+    deadline = time.monotonic() + MAX_DELAY
+    while len(batch) < MAX_BATCH:
+        try:
+            # Take what is already queued, then wait briefly for stragglers
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+    return batch
+
+
+def _commit(batch):
+    results = []
+    try:
+        with connection() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            for fn, args, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT queued_write")
+                try:
+                    results.append((future, fn(conn, *args), None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO queued_write")
+                    results.append((future, None, e))
+                conn.execute("RELEASE queued_write")
+    except Exception as e:
+        # The transaction failed (possibly before any write ran): nothing
+        # in the batch was stored
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(e)
+        _stats["failed"] += len(batch)
+        return
+
+    _stats["batches"] += 1
+    _stats["largest_batch"] = max(_stats["largest_batch"], len(batch))
+    if any(error is None for _, _, error in results):
+        dataset.invalidate()
+    for future, value, error in results:
+        if error is None:
+            _stats["written"] += 1
+            future.set_result(value)
+        else:
+            _stats["failed"] += 1
+            future.set_exception(error)
+
+
+def _run():
+    while not _stop.is_set():
+        batch = _next_batch()
+        if not batch:
+            continue
+        try:
+            _commit(batch)
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def start():
+    """Start the writer thread once per process; later calls are no-ops."""
+    if is_running():
+        return False
+    with _lock:
+        if is_running():
+            return False
+        _stop.clear()
+        _threads[:] = [threading.Thread(target=_run, name="write-queue", daemon=True)]
+        _threads[0].start()
+    return True
+
+
+def stop(timeout=5.0):
+    """Finish the queued writes, then stop the writer thread."""
+    wait_idle(timeout)
+    _stop.set()
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
+
+
+def wait_idle(timeout=None):
+    """Block until every queued write is committed; returns False on timeout."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while _queue.unfinished_tasks:
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
@@ -0,0 +1,108 @@
+"""Load-test the read-only JSON API against a synthetic database, offline.
+
+Usage: python -m benchmarks.bench_api [--recipes N] [--requests N] [--threads N]
+
+Each endpoint is hit twice per round: once cold and once with the ETag from
+the previous response, so the output compares full reads with 304s.
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from app_modules import api, db, geocoding
+from benchmarks.synthetic import SyntheticConfig, build_database, stub_geocoder
+
+PATHS = [
+    "/api/recipes?limit=20",
+    "/api/recipes?sort=alpha&limit=20",
+    "/api/recipes/{recipe_id}",
+    "/api/recipes/{recipe_id}/comments",
+    "/api/ratings?ids={recipe_id},{other_id}",
+    "/api/top-rated?k=10",
+    "/api/recipe-of-the-day",
+    "/api/stats",
+]
+
+
+def _hammer(port, paths, requests, threads, conditional):
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def worker(offset):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        etags = {}
+        for i in range(offset, requests, threads):
+            path = paths[(i // threads + offset) % len(paths)]
+            headers = {"If-None-Match": etags[path]} if conditional and path in etags else {}
+            start = time.perf_counter()
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            elapsed = (time.perf_counter() - start) * 1000
+            etags[path] = response.getheader("ETag") or etags.get(path)
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+        conn.close()
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=2000)
+    parser.add_argument("--comments-per-recipe", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.set_db_file(os.path.join(tmp, "api.db"))
+        geocoding.set_geocoder(stub_geocoder)
+        recipe_ids = build_database(SyntheticConfig(
+            recipes=args.recipes, comments_per_recipe=args.comments_per_recipe,
+        ))
+        paths = [
+            path.format(recipe_id=recipe_ids[len(recipe_ids) // 2], other_id=recipe_ids[0])
+            for path in PATHS
+        ]
+
+        server = api.make_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        try:
+            results = {
+                "full": _hammer(port, paths, args.requests, args.threads, conditional=False),
+                "conditional": _hammer(port, paths, args.requests, args.threads, conditional=True),
+            }
+        finally:
+            server.shutdown()
+            server.server_close()
+            db.close_all()
+
+    print(json.dumps({
+        "recipes": args.recipes, "requests": args.requests, "threads": args.threads,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
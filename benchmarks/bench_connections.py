@@ -0,0 +1,116 @@
+"""Compare per-call sqlite3.connect() against the pooled connection layer.
+
+Usage: python -m benchmarks.bench_connections [--recipes N] [--calls N] [--threads N]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from app_modules import db
+
+
+def _seed(db_file, recipes):
+    conn = sqlite3.connect(db_file)
+    conn.execute("""
+        CREATE TABLE recipes (id INTEGER PRIMARY KEY, dish_name TEXT)
+    """)
+    conn.execute("""
+        CREATE TABLE comments (
+            id INTEGER PRIMARY KEY, recipe_id INTEGER, comment_text TEXT,
+            rating INTEGER, timestamp TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO recipes (id, dish_name) VALUES (?, ?)",
+        ((i, f"dish {i}") for i in range(1, recipes + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _fresh_read(db_file, recipe_id):
+    conn = sqlite3.connect(db_file)
+    conn.execute("SELECT * FROM comments WHERE recipe_id = ?", (recipe_id,)).fetchall()
+    conn.close()
+
+
+def _pooled_read(recipe_id):
+    with db.connection() as conn:
+        conn.execute("SELECT * FROM comments WHERE recipe_id = ?", (recipe_id,)).fetchall()
+
+
+def _fresh_write(db_file, recipe_id):
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "INSERT INTO comments (recipe_id, comment_text, rating, timestamp) VALUES (?, 'x', 5, '')",
+        (recipe_id,),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _pooled_write(recipe_id):
+    with db.connection() as conn:
+        conn.execute(
+            "INSERT INTO comments (recipe_id, comment_text, rating, timestamp) VALUES (?, 'x', 5, '')",
+            (recipe_id,),
+        )
+
+
+def _run_threads(fn, calls, threads):
+    errors = []
+
+    def worker(offset):
+        for i in range(offset, calls, threads):
+            try:
+                fn(i % 50 + 1)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh_db = os.path.join(tmp, "fresh.db")
+        pooled_db = os.path.join(tmp, "pooled.db")
+        _seed(fresh_db, args.recipes)
+        _seed(pooled_db, args.recipes)
+        db.set_db_file(pooled_db)
+
+        for label, fn in [
+            ("fresh_read", lambda rid: _fresh_read(fresh_db, rid)),
+            ("pooled_read", _pooled_read),
+            ("fresh_write", lambda rid: _fresh_write(fresh_db, rid)),
+            ("pooled_write", _pooled_write),
+        ]:
+            elapsed, errors = _run_threads(fn, args.calls, args.threads)
+            results[label] = {
+                "seconds": round(elapsed, 4),
+                "us_per_call": round(elapsed / args.calls * 1e6, 1),
+                "locked_errors": errors,
+            }
+        db.close_all()
+
+    print(json.dumps({"calls": args.calls, "threads": args.threads, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
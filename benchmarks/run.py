@@ -0,0 +1,232 @@
+"""Benchmark the storage, search and rendering data paths at several scales.
+
+Usage:
+    python -m benchmarks.run [--scales 1k,10k] [--output results.json]
+    python -m benchmarks.run --compare base.json new.json
+
+Each scale is a total comment count; recipes = comments / comments-per-recipe.
+Everything runs against a throwaway database with a stubbed geocoder, so no
+network access is needed. Results are JSON (milliseconds per call).
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_modules import dataset, db, geocoding, images
+from app_modules import utils
+from app_modules import display
+from app_modules.search import search_recipe_ids
+from benchmarks.synthetic import SyntheticConfig, build_database, stub_geocoder
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+BURST_WRITERS = 16
+BURST_COMMENTS = 10
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "repeat": repeat,
+    }
+
+
+def _cold(fn):
+    def run():
+        dataset.invalidate(full=True)
+        fn()
+    return run
+
+
+def bench_scale(label, comments, args, workdir):
+    db_file = os.path.join(workdir, f"bench_{label}.db")
+    db.set_db_file(db_file)
+    images.IMAGE_DIR = os.path.join(workdir, f"images_{label}")
+    geocoding.set_geocoder(stub_geocoder)
+    dataset.invalidate(full=True)
+
+    config = SyntheticConfig(
+        recipes=max(1, comments // args.comments_per_recipe),
+        comments_per_recipe=args.comments_per_recipe,
+        countries=args.countries,
+        languages=args.languages,
+        images=args.images,
+        image_size=tuple(args.image_size),
+        seed=args.seed,
+    )
+    start = time.perf_counter()
+    recipe_ids = build_database(config)
+    build_seconds = time.perf_counter() - start
+
+    repeat = args.repeat
+    sample_id = recipe_ids[len(recipe_ids) // 2]
+    page_ids = recipe_ids[:10]
+    df = utils.load_data()
+    _, deep_cursor = utils.get_recipe_page("Alphabetical", 10)
+    for _ in range(min(20, len(recipe_ids) // 10)):
+        _, next_cursor = utils.get_recipe_page("Alphabetical", 10, cursor=deep_cursor)
+        deep_cursor = next_cursor or deep_cursor
+
+    def resolve_map():
+        geocoding.clear_lru()
+        frame = df.drop(columns=["latitude", "longitude"])
+        geocoding.resolve_coordinates(frame)
+
+    counter = iter(range(10 ** 9))
+
+    def write_comment():
+        utils.add_comment(sample_id, "Bench", "Tasty", 5)
+
+    def comment_burst(batched=True):
+        # BURST_WRITERS visitors each posting BURST_COMMENTS comments at once
+        def post(_):
+            for _ in range(BURST_COMMENTS):
+                if batched:
+                    utils.add_comment(sample_id, "Bench", "Tasty", 5)
+                else:
+                    with db.connection() as conn:
+                        utils._insert_comment(conn, sample_id, "Bench", "Tasty", 5,
+                                              utils.get_timestamp())
+        with ThreadPoolExecutor(BURST_WRITERS) as pool:
+            list(pool.map(post, range(BURST_WRITERS)))
+
+    def write_recipe():
+        n = next(counter)
+        utils.insert_recipe({"name": "Bench", "dish_name": f"Bench Dish {n}",
+                             "country": "India", "ingredients": "rice\nghee",
+                             "timestamp": utils.get_timestamp()})
+
+    cases = {
+        "load_data_cold": _cold(utils.load_data),
+        "load_data_warm": utils.load_data,
+        "recipe_page_first": lambda: utils.get_recipe_page("Most Recent", 10),
+        "recipe_page_deep": lambda: utils.get_recipe_page("Alphabetical", 10, cursor=deep_cursor),
+        "show_recipes_page_search": lambda: display._load_page("rice", "Most Recent", 10, None),
+        "show_recipes_page_best_match": lambda: display._load_page("rice ghee", "Best Match", 10, None),
+        "search_substring": lambda: search_recipe_ids("jagg", limit=10),
+        "search_native_script": lambda: search_recipe_ids("పులి", limit=10),
+        "admin_picker_prefix": lambda: utils.search_dish_names("Rice"),
+        "admin_picker_substring": lambda: utils.search_dish_names("curr"),
+        "get_comments": lambda: utils.get_comments(sample_id),
+        "get_comments_for_page": lambda: utils.get_comments_for_recipes(page_ids, limit_per_recipe=20),
+        "get_recipe_detail": lambda: utils.get_recipe_detail([sample_id]),
+        "get_recipe_detail_page": lambda: utils.get_recipe_detail(page_ids),
+        "get_top_rated_recipe": utils.get_top_rated_recipe,
+        "community_stats": utils.get_community_stats,
+        "community_activity": lambda: utils.get_activity("week"),
+        "top_rated_by_country": lambda: utils.get_top_rated(10, country="India"),
+        "is_duplicate": lambda: utils.is_duplicate("Cook 1", "Rice Curry 1"),
+        "find_similar_recipes": lambda: utils.find_similar_recipes("rice\nmoong dal\nghee\ncumin"),
+        "ingredients_all_of": lambda: utils.find_recipes_with_ingredients(["rice", "ghee"]),
+        "pantry_match": lambda: utils.match_pantry("rice\nmoong dal\nghee\ncumin\nsalt\nonion"),
+        "map_resolve_coordinates": resolve_map,
+        "map_locations": utils.get_map_locations,
+        "map_locations_grid": lambda: utils.get_map_locations(grid=5),
+        "add_comment": write_comment,
+        "insert_recipe": write_recipe,
+        "comment_burst": comment_burst,
+        "comment_burst_unbatched": lambda: comment_burst(batched=False),
+    }
+    results = {}
+    for name, fn in cases.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = _time(fn, repeat)
+        print(f"  {label:>5} {name:<30} {results[name]['median_ms']:>10.3f} ms", file=sys.stderr)
+
+    db.close_all()
+    return {
+        "comments": comments,
+        "recipes": config.recipes,
+        "build_seconds": round(build_seconds, 2),
+        "db_bytes": os.path.getsize(db_file),
+        "catalog_bytes": int(df.memory_usage(deep=True).sum()),
+        "results": results,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base_path, new_path, threshold):
+    """Print per-case median ratios; exit non-zero if any regressed past threshold."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    regressed = False
+    for scale, new_scale in new["scales"].items():
+        base_scale = base["scales"].get(scale)
+        if not base_scale:
+            continue
+        for case, stats in new_scale["results"].items():
+            old = base_scale["results"].get(case)
+            if not old or not old["median_ms"]:
+                continue
+            ratio = stats["median_ms"] / old["median_ms"]
+            flag = "  REGRESSION" if ratio > threshold else ""
+            regressed |= bool(flag)
+            print(f"{scale:>5} {case:<30} {old['median_ms']:>10.3f} -> {stats['median_ms']:>10.3f} ms  x{ratio:.2f}{flag}")
+    return 1 if regressed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1k,10k", help=f"comma list of {', '.join(SCALES)}")
+    parser.add_argument("--comments-per-recipe", type=int, default=10)
+    parser.add_argument("--countries", type=int, default=8)
+    parser.add_argument("--languages", type=int, default=4)
+    parser.add_argument("--images", type=int, default=0)
+    parser.add_argument("--image-size", type=int, nargs=2, default=[1600, 1200], metavar=("W", "H"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", type=lambda s: s.split(","), default=None, help="comma list of case names")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"))
+    parser.add_argument("--threshold", type=float, default=1.25, help="regression ratio for --compare")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "scales": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for label in args.scales.split(","):
+            report["scales"][label] = bench_scale(label, SCALES[label], args, workdir)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Deterministic synthetic data for benchmarks.
+
+``build_database`` fills a throwaway database through the same schema as
+the app (``init_storage``), bulk-loading rows so triggers and derived
+tables are populated exactly as in production.
+"""
+import datetime
+import io
+import random
+from dataclasses import dataclass
+
+from app_modules import dedup, images, ingredient_index
+from app_modules.db import connection
+from app_modules.utils import init_storage
+
+DISH_WORDS = {
+    "English": ["Rice", "Curry", "Dal", "Halwa", "Biryani", "Pongal", "Kheer", "Roti",
+                "Chutney", "Pickle", "Fry", "Stew", "Laddu", "Payasam", "Upma"],
+    "Telugu": ["పులిహోర", "పెసరట్టు", "గోంగూర", "పప్పు", "ఉప్మా", "బొబ్బట్లు"],
+    "Hindi": ["खिचड़ी", "पराठा", "हलवा", "राजमा", "छोले", "कढ़ी"],
+    "Tamil": ["பொங்கல்", "சாம்பார்", "இட்லி", "ரசம்", "பாயசம்"],
+}
+INGREDIENTS = [
+    "rice", "moong dal", "toor dal", "urad dal", "ghee", "cumin", "mustard seeds",
+    "curry leaves", "tamarind", "jaggery", "turmeric", "red chilli", "green chilli",
+    "ginger", "garlic", "onion", "tomato", "coconut", "cashews", "cardamom", "milk",
+    "wheat flour", "gram flour", "coriander", "peanuts", "sesame", "salt", "pepper",
+    "egg", "potato", "spinach", "gongura leaves", "yogurt", "sugar", "saffron",
+]
+CATEGORIES = ["Main Course", "Snack", "Dessert", "Festival Special", "Other"]
+GAZETTEER_COUNTRIES = ["India", "Nepal", "Sri Lanka", "Bangladesh", "Pakistan", "Malaysia"]
+
+
+@dataclass
+class SyntheticConfig:
+    recipes: int = 1000
+    comments_per_recipe: int = 1
+    countries: int = 8
+    languages: int = 4
+    contributors: int = 200
+    images: int = 0
+    image_size: tuple = (1600, 1200)
+    text_words: int = 60
+    seed: int = 42
+
+
+def country_names(count):
+    """Gazetteer countries first, then made-up regions that need geocoding."""
+    names = GAZETTEER_COUNTRIES[:count]
+    names += [f"Region {i}" for i in range(count - len(names))]
+    return names
+
+
+def stub_geocoder(place):
+    """Deterministic offline stand-in for Nominatim."""
+    rng = random.Random(place)
+    return (rng.uniform(-60, 60), rng.uniform(-180, 180))
+
+
+def _text(rng, words):
+    vocab = INGREDIENTS + ["stir", "boil", "simmer", "serve", "grandmother", "festival", "village"]
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def generate_recipes(config):
+    rng = random.Random(config.seed)
+    languages = list(DISH_WORDS)[:max(1, config.languages)]
+    countries = country_names(config.countries)
+    start = datetime.datetime(2024, 1, 1)
+    for i in range(config.recipes):
+        language = rng.choice(languages)
+        dish = f"{rng.choice(DISH_WORDS[language])} {rng.choice(DISH_WORDS['English'])} {i}"
+        name = f"Cook {rng.randrange(config.contributors)}"
+        ingredients = "\n".join(rng.sample(INGREDIENTS, rng.randint(4, 10)))
+        yield {
+            "name": name,
+            "language": language,
+            "dish_name": dish,
+            "category": rng.choice(CATEGORIES),
+            "country": rng.choice(countries),
+            "ingredients": ingredients,
+            "instructions": _text(rng, config.text_words),
+            "story": _text(rng, config.text_words // 2),
+            "timestamp": (start + datetime.timedelta(minutes=7 * i)).isoformat(),
+            "dedup_key": dedup.recipe_key(name, dish),
+        }
+
+
+def generate_comments(config, recipe_ids):
+    rng = random.Random(config.seed + 1)
+    start = datetime.datetime(2024, 6, 1)
+    for recipe_id in recipe_ids:
+        for j in range(config.comments_per_recipe):
+            yield (
+                recipe_id,
+                f"Reader {rng.randrange(5000)}",
+                _text(rng, 12),
+                rng.choice([None, 3, 4, 4, 5, 5, 2, 1]),
+                (start + datetime.timedelta(seconds=recipe_id * 97 + j)).isoformat(),
+            )
+
+
+def generate_image(size, seed):
+    """Noisy RGB JPEG of ``size`` (stands in for a phone photo)."""
+    from PIL import Image
+    rng = random.Random(seed)
+    image = Image.effect_noise(size, 64).convert("RGB")
+    overlay = Image.new("RGB", size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    image = Image.blend(image, overlay, 0.5)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def build_database(config, batch_size=5000):
+    """Populate the current DB_FILE; returns the list of recipe ids."""
+    init_storage()
+    columns = ["name", "language", "dish_name", "category", "country", "ingredients",
+               "instructions", "story", "timestamp", "dedup_key"]
+    insert_sql = (
+        f"INSERT INTO recipes ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' * len(columns))})"
+    )
+    batch = []
+    with connection() as conn:
+        for recipe in generate_recipes(config):
+            batch.append(tuple(recipe[col] for col in columns))
+            if len(batch) >= batch_size:
+                conn.executemany(insert_sql, batch)
+                batch.clear()
+        if batch:
+            conn.executemany(insert_sql, batch)
+
+        recipe_ids = [row[0] for row in conn.execute("SELECT id FROM recipes ORDER BY id")]
+        for recipe_id, ingredients in conn.execute("SELECT id, ingredients FROM recipes").fetchall():
+            dedup.index_recipe(conn, recipe_id, ingredients)
+            ingredient_index.index_recipe(conn, recipe_id, ingredients)
+
+        comment_sql = """
+            INSERT INTO comments (recipe_id, commenter_name, comment_text, rating, timestamp)
+            VALUES (?, ?, ?, ?, ?)
+        """
+        comments = generate_comments(config, recipe_ids)
+        while True:
+            chunk = [row for _, row in zip(range(batch_size), comments)]
+            if not chunk:
+                break
+            conn.executemany(comment_sql, chunk)
+
+    if config.images:
+        rng = random.Random(config.seed + 2)
+        for i in range(config.images):
+            stored = images.store_image(generate_image(config.image_size, config.seed + i))
+            with connection() as conn:
+                conn.execute(
+                    "UPDATE recipes SET image_path = ?, thumb_path = ?, image_hash = ? WHERE id = ?",
+                    (stored["image_path"], stored["thumb_path"], stored["image_hash"],
+                     rng.choice(recipe_ids)),
+                )
+    return recipe_ids
@@ -0,0 +1,97 @@
+import pytest
+
+from app_modules import db, geocode_worker, geocoding, utils, write_queue
+from app_modules.db import connection
+
+# Places the stub geocoder can't find; everything else resolves
+UNKNOWN_PLACES = {"Nowhere"}
+
+
+def stub_geocoder(place):
+    """Deterministic offline stand-in for Nominatim."""
+    if place in UNKNOWN_PLACES:
+        return None
+    seed = sum(map(ord, place))
+    return (seed % 120 - 60 + 0.5, seed % 360 - 180 + 0.25)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def background_threads():
+    yield
+    geocode_worker.stop()
+    write_queue.stop()
+
+
+@pytest.fixture(autouse=True)
+def storage(tmp_path, monkeypatch):
+    """A fresh database in ``tmp_path`` with the stub geocoder, torn down after the test."""
+    monkeypatch.chdir(tmp_path)
+    previous = db.DB_FILE
+    db.set_db_file(str(tmp_path / "recipes.db"))
+    geocoding.set_geocoder(stub_geocoder)
+    utils.init_storage()
+    yield tmp_path
+    # The writer thread outlives the test; it must be done with this database
+    write_queue.wait_idle(5)
+    geocode_worker.stop()
+    # Countries queued but never looked up belong to this test's database
+    while not geocode_worker._queue.empty():
+        geocode_worker._queue.get_nowait()
+        geocode_worker._queue.task_done()
+    geocode_worker._pending.clear()
+    geocoding.set_geocoder(None)
+    db.set_db_file(previous)
+
+
+def recipe(n, **fields):
+    """A recipe entry for ``utils.insert_recipe``; ``n`` keeps name and dish unique."""
+    entry = {
+        "name": f"Cook {n}",
+        "language": "English",
+        "dish_name": f"Dish {n}",
+        "category": "Main Course",
+        "country": "India",
+        "ingredients": "2 cups basmati rice\n1 onion\n3 cloves garlic",
+        "instructions": "Cook it.",
+        "story": "",
+        "timestamp": f"2024-01-{n % 28 + 1:02d}T12:00:00",
+    }
+    entry.update(fields)
+    return entry
+
+
+@pytest.fixture
+def populated():
+    """Three recipes in different countries, with rated and unrated comments."""
+    ids = [
+        utils.insert_recipe(recipe(1)),
+        utils.insert_recipe(recipe(2, country="Italy", category="Dessert", ingredients="flour, sugar, eggs")),
+        utils.insert_recipe(recipe(3, country="Japan", language="Japanese")),
+    ]
+    for n, (recipe_id, rating) in enumerate([(ids[0], 5), (ids[0], 3), (ids[1], 4), (ids[2], None)]):
+        utils.add_comment(recipe_id, f"Reader {n}", "Lovely", rating)
+    return ids
+
+
+def snapshot(conn, tables):
+    """Sorted rows of ``tables``, floats rounded so incremental sums compare equal."""
+    result = {}
+    for table in tables:
+        rows = conn.execute(f"SELECT * FROM {table}").fetchall()
+        result[table] = sorted(
+            tuple(round(value, 9) if isinstance(value, float) else value for value in row)
+            for row in rows
+        )
+    return result
+
+
+def assert_matches_rebuild(rebuild, tables):
+    """The trigger-maintained ``tables`` equal what ``rebuild`` computes from scratch."""
+    with connection() as conn:
+        maintained = snapshot(conn, tables)
+        conn.execute("SAVEPOINT check_rebuild")
+        rebuild(conn.cursor())
+        rebuilt = snapshot(conn, tables)
+        conn.execute("ROLLBACK TO check_rebuild")
+        conn.execute("RELEASE check_rebuild")
+    assert maintained == rebuilt
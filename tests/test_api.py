@@ -0,0 +1,107 @@
+import base64
+import http.client
+import json
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+
+from app_modules import api, utils
+from app_modules.db import connection
+from conftest import recipe
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(api, "VERSION_CHECK_INTERVAL", 0)
+    utils.insert_recipe(recipe(1))
+    utils.insert_recipe(recipe(2))
+    server = api.make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get(server, path, **headers):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    try:
+        conn.request("GET", path, headers={key.replace("_", "-"): value for key, value in headers.items()})
+        response = conn.getresponse()
+        body = response.read()
+        return response.status, dict(response.getheaders()), json.loads(body) if body else None
+    finally:
+        conn.close()
+
+
+def _set_changed_at(epoch_seconds):
+    # changed_at alone doesn't fire the trigger that stamps it
+    with connection() as conn:
+        conn.execute("UPDATE db_meta SET changed_at = ?", (epoch_seconds * 1000,))
+
+
+def test_if_none_match_gets_304_until_a_write(server):
+    status, headers, body = _get(server, "/api/recipes")
+    assert status == 200
+    assert len(body["recipes"]) == 2
+    etag = headers["ETag"]
+
+    status, headers, body = _get(server, "/api/recipes", If_None_Match=etag)
+    assert status == 304
+    assert body is None
+    assert headers["ETag"] == etag
+
+    status, _, _ = _get(server, "/api/recipes", If_None_Match=f'"other", W/{etag}')
+    assert status == 304
+
+    utils.add_comment(1, "Reader", "Lovely", 5)
+    status, headers, _ = _get(server, "/api/recipes", If_None_Match=etag)
+    assert status == 200
+    assert headers["ETag"] != etag
+
+
+def test_if_modified_since_gets_304(server):
+    _set_changed_at(1_700_000_000)
+    status, headers, _ = _get(server, "/api/stats")
+    assert status == 200
+    assert headers["Last-Modified"] == formatdate(1_700_000_000, usegmt=True)
+
+    status, _, _ = _get(server, "/api/stats", If_Modified_Since=headers["Last-Modified"])
+    assert status == 304
+    status, _, _ = _get(server, "/api/stats", If_Modified_Since=formatdate(1_600_000_000, usegmt=True))
+    assert status == 200
+
+
+def test_change_in_current_second_has_no_last_modified(server):
+    # Stamped in the current second, so a later write could share the timestamp
+    _set_changed_at(int(time.time()) + 1)
+    status, headers, _ = _get(server, "/api/stats")
+    assert status == 200
+    assert "Last-Modified" not in headers
+
+
+def test_cursor_walks_every_page(server):
+    ids, cursor = [], None
+    while True:
+        status, _, body = _get(server, "/api/recipes?limit=1" + (f"&cursor={cursor}" if cursor else ""))
+        assert status == 200
+        ids.extend(row["id"] for row in body["recipes"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(ids) == [1, 2]
+
+
+@pytest.mark.parametrize("cursor", [[1, 2], ["x"], ["x", True], {"a": 1}, "x"])
+def test_malformed_cursor_is_400(server, cursor):
+    raw = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+    status, _, body = _get(server, f"/api/recipes?cursor={raw}")
+    assert status == 400
+    assert body == {"error": "invalid cursor"}
+
+
+def test_undecodable_cursor_is_400(server):
+    status, _, _ = _get(server, "/api/recipes?cursor=%%%")
+    assert status == 400
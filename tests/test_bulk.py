@@ -0,0 +1,81 @@
+import io
+import json
+import os
+
+from PIL import Image
+
+from app_modules import bulk, db, geocode_worker, geocoding, images, utils
+from conftest import recipe, stub_geocoder
+
+
+def _png(color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _switch_database(path):
+    db.set_db_file(str(path))
+    utils.init_storage()
+
+
+def test_validate_rejects_bad_records():
+    assert bulk.validate({"dish_name": "x"})[1] == "missing required field(s): ingredients, instructions"
+    assert bulk.validate({**recipe(1), "story": 3})[1] == "field(s) must be text: story"
+    entry, error = bulk.validate(recipe(1, dish_name="masala dosa", category=""))
+    assert error is None
+    assert (entry["dish_name"], entry["category"]) == ("Masala Dosa", "Other")
+
+
+def test_export_import_round_trip(storage):
+    stored = images.store_image(_png())
+    utils.insert_recipe(recipe(1, **stored))
+    utils.insert_recipe(recipe(2, country="Atlantis"))
+    os.makedirs("backups")
+    with open("backups/recipes.jsonl", "w", encoding="utf-8") as out:
+        assert bulk.export_recipes(out) == 2
+
+    _switch_database(storage / "restored.db")
+    summary = bulk.import_recipes("backups/recipes.jsonl", log=lambda message: None)
+
+    assert (summary["inserted"], summary["invalid"]) == (2, 0)
+    restored = utils.get_recipe(1)
+    assert (restored["image_path"], restored["thumb_path"], restored["image_hash"]) == (
+        stored["image_path"], stored["thumb_path"], stored["image_hash"]
+    )
+
+
+def test_relative_image_paths_fall_back_to_working_directory(storage):
+    os.makedirs("photos")
+    with open("photos/dish.png", "wb") as f:
+        f.write(_png("blue"))
+    os.makedirs("incoming")
+    with open("incoming/recipes.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps(recipe(1, image_path="photos/dish.png")) + "\n")
+        f.write(json.dumps(recipe(2, image_path="photos/missing.png")) + "\n")
+        f.write(json.dumps(recipe(3, image_path="photos\\dish.png")) + "\n")
+
+    summary = bulk.import_recipes("incoming/recipes.jsonl", log=lambda message: None)
+
+    assert (summary["inserted"], summary["invalid"]) == (2, 1)
+    assert os.path.exists(utils.get_recipe(1)["thumb_path"])
+    # The invalid line takes no id, so the backslash row is recipe 2
+    assert utils.get_recipe(2)["image_hash"] == utils.get_recipe(1)["image_hash"]
+
+
+def test_unknown_countries_go_through_the_worker(storage, monkeypatch):
+    with open("recipes.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps(recipe(1, country="India")) + "\n")
+        f.write(json.dumps(recipe(2, country="Atlantis")) + "\n")
+    network_calls = geocoding.stats()["network_calls"]
+
+    summary = bulk.import_recipes("recipes.jsonl", log=lambda message: None)
+
+    assert (summary["countries"], summary["geocode_queued"]) == (1, 1)
+    assert geocoding.stats()["network_calls"] == network_calls
+    assert utils.get_recipe(2)["latitude"] is None
+
+    monkeypatch.setattr(geocode_worker._limiter, "interval", 0)
+    geocode_worker.start(run_backfill=False)
+    assert geocode_worker.wait_idle(5)
+    assert (utils.get_recipe(2)["latitude"], utils.get_recipe(2)["longitude"]) == stub_geocoder("Atlantis")
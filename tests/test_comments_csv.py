@@ -0,0 +1,38 @@
+import csv
+
+from app_modules import comments_csv, utils
+from app_modules.db import connection
+from conftest import recipe
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(comments_csv.FIELDS)
+        writer.writerows(rows)
+
+
+def _index_names():
+    with connection() as conn:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_migrate_skips_repeats_and_orphans(storage):
+    recipe_id = utils.insert_recipe(recipe(1))
+    utils.add_comment(recipe_id, "Asha", "Already here", 4)
+    _write_csv("comments.csv", [
+        [recipe_id, "Ravi", "Lovely", "5"],
+        [recipe_id, "Ravi", "Lovely", "5"],
+        [recipe_id, "Asha", "Already here", "4"],
+        [recipe_id, "Meena", "No stars", ""],
+        [999, "Ghost", "Orphan", "3"],
+        ["abc", "Bad", "Not an id", "1"],
+    ])
+
+    assert comments_csv.migrate_to_sqlite("comments.csv", batch_size=2) == (2, 3, 1)
+    assert sorted(name for name, *_ in utils.get_comments(recipe_id)) == ["Asha", "Meena", "Ravi"]
+    assert utils.get_ratings([recipe_id])[recipe_id]["rating_count"] == 2
+    assert "idx_comments_csv_import" not in _index_names()
+
+    # Re-running imports nothing new
+    assert comments_csv.migrate_to_sqlite("comments.csv") == (0, 5, 1)
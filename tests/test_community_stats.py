@@ -0,0 +1,30 @@
+from app_modules import community_stats
+from app_modules.db import connection
+from conftest import assert_matches_rebuild
+
+TABLES = ["community_stats", "stats_breakdown", "stats_daily"]
+
+
+def test_inserts_match_rebuild(populated):
+    assert_matches_rebuild(community_stats.rebuild, TABLES)
+    summary = community_stats.summary()
+    assert (summary["recipes"], summary["comments"], summary["ratings"]) == (3, 4, 3)
+    assert summary["countries"] == 3
+
+
+def test_updates_match_rebuild(populated):
+    with connection() as conn:
+        conn.execute("UPDATE recipes SET country = 'Italy', language = 'Italian' WHERE id = ?", (populated[0],))
+        conn.execute("UPDATE recipes SET timestamp = '2023-06-01T08:00:00' WHERE id = ?", (populated[2],))
+        conn.execute("UPDATE comments SET rating = 2 WHERE rating IS NULL")
+        conn.execute("UPDATE comments SET timestamp = '2023-06-01T08:00:00' WHERE rating = 4")
+    assert_matches_rebuild(community_stats.rebuild, TABLES)
+
+
+def test_deletes_match_rebuild(populated):
+    with connection() as conn:
+        conn.execute("DELETE FROM comments WHERE rating = 3")
+        conn.execute("DELETE FROM comments WHERE recipe_id = ?", (populated[1],))
+        conn.execute("DELETE FROM recipes WHERE id = ?", (populated[1],))
+    assert_matches_rebuild(community_stats.rebuild, TABLES)
+    assert community_stats.summary()["countries"] == 2
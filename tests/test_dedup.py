@@ -0,0 +1,20 @@
+from app_modules import utils
+from conftest import recipe
+
+
+def test_duplicate_insert_is_skipped():
+    first = utils.insert_recipe(recipe(1))
+    assert first is not None
+    assert utils.is_duplicate("Cook 1", "Dish 1")
+    # Same contributor and dish after normalization
+    assert utils.insert_recipe(recipe(1, name="  COOK 1 ", dish_name="DISH   1")) is None
+    assert utils.insert_recipe(recipe(1, ingredients="something else")) is None
+    assert utils.get_recipe(first)["ingredients"] == recipe(1)["ingredients"]
+    assert len(utils.load_data()) == 1
+
+
+def test_near_duplicates_found_by_ingredients():
+    first = utils.insert_recipe(recipe(1, ingredients="rice, dal, ghee, cumin, salt"))
+    utils.insert_recipe(recipe(2, ingredients="flour, sugar, eggs, butter"))
+    matches = utils.find_similar_recipes("rice, dal, ghee, cumin, salt")
+    assert [recipe_id for recipe_id, _, _ in matches] == [first]
@@ -0,0 +1,40 @@
+from app_modules import dataset, geocode_worker, geocoding, utils
+from app_modules.db import connection
+from conftest import recipe, stub_geocoder
+
+
+def _coordinates(recipe_id):
+    with connection() as conn:
+        return conn.execute(
+            "SELECT latitude, longitude FROM recipes WHERE id = ?", (recipe_id,)
+        ).fetchone()
+
+
+def test_worker_backfills_unknown_countries(monkeypatch):
+    recipe_id = utils.insert_recipe(recipe(1, country="Atlantis"))
+    lost_id = utils.insert_recipe(recipe(2, country="Nowhere"))
+    assert _coordinates(recipe_id) == (None, None)
+    loads = dataset.stats()["full_loads"]
+    utils.load_data()
+
+    monkeypatch.setattr(geocode_worker._limiter, "interval", 0)
+    geocode_worker.start()
+    assert geocode_worker.wait_idle(5)
+
+    assert _coordinates(recipe_id) == stub_geocoder("Atlantis")
+    assert _coordinates(lost_id) == (None, None)
+    assert geocoding.lookup_cached("Atlantis") == stub_geocoder("Atlantis")
+    with connection() as conn:
+        assert conn.execute("SELECT recipe_count FROM map_locations WHERE country = 'Atlantis'").fetchone() == (1,)
+
+    # The cached catalog picks the coordinates up without a full reload
+    recipes = utils.load_data()
+    row = recipes.loc[recipes["id"] == recipe_id].iloc[0]
+    assert (row["latitude"], row["longitude"]) == stub_geocoder("Atlantis")
+    assert dataset.stats()["full_loads"] == loads + 1
+
+
+def test_known_country_is_filled_in_on_insert():
+    recipe_id = utils.insert_recipe(recipe(1, country="India"))
+    assert None not in _coordinates(recipe_id)
+    assert geocode_worker.stats()["pending"] == 0
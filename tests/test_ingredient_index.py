@@ -0,0 +1,59 @@
+from app_modules import ingredient_index, utils
+from app_modules.db import connection
+from conftest import recipe
+
+
+def _assert_counts_match_postings():
+    with connection() as conn:
+        drift = conn.execute("""
+            SELECT v.name, v.recipe_count, COUNT(ri.recipe_id)
+            FROM ingredient_vocab v
+            LEFT JOIN recipe_ingredients ri ON ri.ingredient_id = v.id
+            GROUP BY v.id
+            HAVING v.recipe_count != COUNT(ri.recipe_id)
+        """).fetchall()
+        orphaned_sets = conn.execute("""
+            SELECT recipe_id FROM recipe_ingredient_sets
+            WHERE recipe_id NOT IN (SELECT id FROM recipes)
+        """).fetchall()
+    assert drift == []
+    assert orphaned_sets == []
+
+
+def test_parse_strips_quantities_and_notes():
+    text = "2 cups Basmati rice, washed\n1 onion (large)\n3 cloves garlic"
+    assert ingredient_index.parse_ingredients(text) == ["basmati rice", "onion", "cloves garlic"]
+    assert ingredient_index.parse_ingredients("salt, pepper, salt") == ["salt", "pepper"]
+
+
+def test_terms_match_trailing_words(populated):
+    assert utils.find_recipes_with_ingredients(["rice", "onion"]) == [populated[0], populated[2]]
+    assert utils.find_recipes_with_ingredients(["garlic"]) == [populated[0], populated[2]]
+    assert utils.find_recipes_with_ingredients(["basmati"]) == []
+    assert utils.find_recipes_with_ingredients(["rice", "sugar"]) == []
+
+
+def test_pantry_ranks_by_coverage(populated):
+    matches = utils.match_pantry("flour\nsugar\nrice")
+    assert matches["id"].tolist()[0] == populated[1]
+    top = matches.iloc[0]
+    assert (top["matched"], top["ingredient_count"], top["missing"]) == (2, 3, ["eggs"])
+
+
+def test_counts_follow_updates_and_deletes(populated):
+    _assert_counts_match_postings()
+    with connection() as conn:
+        conn.execute("UPDATE recipes SET ingredients = 'tofu' WHERE id = ?", (populated[0],))
+        conn.execute("DELETE FROM comments WHERE recipe_id = ?", (populated[1],))
+        conn.execute("DELETE FROM recipes WHERE id = ?", (populated[1],))
+    _assert_counts_match_postings()
+    assert utils.find_recipes_with_ingredients(["flour"]) == []
+
+
+def test_suffixes_backfill_existing_vocabulary():
+    utils.insert_recipe(recipe(1, ingredients="wild jasmine rice"))
+    with connection() as conn:
+        conn.execute("DELETE FROM ingredient_suffixes")
+        ingredient_index.index_suffixes(conn.cursor())
+    assert utils.find_recipes_with_ingredients(["jasmine rice"]) == [1]
+    assert utils.find_recipes_with_ingredients(["rice"]) == [1]
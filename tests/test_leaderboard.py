@@ -0,0 +1,34 @@
+from app_modules import leaderboard, utils
+from app_modules.db import connection
+from conftest import assert_matches_rebuild
+
+TABLES = ["recipe_ratings"]
+
+
+def test_inserts_match_rebuild(populated):
+    assert_matches_rebuild(leaderboard.rebuild, TABLES)
+    ratings = utils.get_ratings(populated)
+    assert ratings[populated[0]]["avg_rating"] == 4
+    assert ratings[populated[0]]["histogram"] == [0, 0, 1, 0, 1]
+
+
+def test_updates_match_rebuild(populated):
+    with connection() as conn:
+        conn.execute("UPDATE recipes SET category = 'Snack', country = 'Italy' WHERE id = ?", (populated[0],))
+        conn.execute("UPDATE comments SET rating = 1 WHERE rating = 5")
+        conn.execute("UPDATE comments SET rating = 2 WHERE rating IS NULL")
+    assert_matches_rebuild(leaderboard.rebuild, TABLES)
+
+
+def test_deletes_match_rebuild(populated):
+    with connection() as conn:
+        conn.execute("DELETE FROM comments WHERE rating = 3")
+        conn.execute("DELETE FROM comments WHERE recipe_id = ?", (populated[1],))
+        conn.execute("DELETE FROM recipes WHERE id = ?", (populated[1],))
+    assert_matches_rebuild(leaderboard.rebuild, TABLES)
+
+
+def test_top_rated_orders_by_score(populated):
+    # Both average 4; the prior favours the recipe with more ratings
+    assert leaderboard.top_rated(3)["id"].tolist() == [populated[0], populated[1]]
+    assert leaderboard.top_rated(3, category="Dessert")["id"].tolist() == [populated[1]]
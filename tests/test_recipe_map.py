@@ -0,0 +1,31 @@
+from app_modules import recipe_map
+from app_modules.db import connection
+from conftest import assert_matches_rebuild
+
+TABLES = ["map_locations"]
+
+
+def test_inserts_match_rebuild(populated):
+    assert_matches_rebuild(recipe_map.rebuild, TABLES)
+    assert recipe_map.get_locations()["recipe_count"].sum() == 3
+
+
+def test_moves_and_deletes_match_rebuild(populated):
+    with connection() as conn:
+        conn.execute("UPDATE recipes SET latitude = 1.5, longitude = 2.5 WHERE id = ?", (populated[2],))
+        conn.execute("UPDATE recipes SET country = 'Italy' WHERE id = ?", (populated[0],))
+        conn.execute("DELETE FROM comments WHERE recipe_id = ?", (populated[1],))
+        conn.execute("DELETE FROM recipes WHERE id = ?", (populated[1],))
+    assert_matches_rebuild(recipe_map.rebuild, TABLES)
+
+
+def test_shared_location_label_matches_rebuild(populated):
+    with connection() as conn:
+        conn.execute("UPDATE recipes SET latitude = 10, longitude = 10")
+        conn.execute("UPDATE recipes SET country = 'Chile' WHERE id = ?", (populated[2],))
+    assert_matches_rebuild(recipe_map.rebuild, TABLES)
+    with connection() as conn:
+        conn.execute("DELETE FROM comments WHERE recipe_id = ?", (populated[2],))
+        conn.execute("DELETE FROM recipes WHERE id = ?", (populated[2],))
+    assert_matches_rebuild(recipe_map.rebuild, TABLES)
+    assert recipe_map.get_locations()["country"].tolist() == ["India"]
@@ -0,0 +1,66 @@
+import pytest
+
+from app_modules import utils
+from app_modules.db import connection
+from conftest import recipe
+
+
+@pytest.fixture
+def catalog():
+    # Several recipes share a timestamp or a dish name, so ties need the id
+    for n in range(23):
+        utils.insert_recipe(recipe(
+            n, dish_name=f"Dish {n % 5}" if n % 3 else None,
+            timestamp=f"2024-01-0{n % 4 + 1}T12:00:00" if n % 7 else None,
+        ))
+    return utils.load_data()
+
+
+def _pages(sort, page_size, **kwargs):
+    ids, cursor = [], None
+    while True:
+        page, cursor = utils.get_recipe_page(sort, page_size, cursor=cursor, **kwargs)
+        assert len(page) <= page_size
+        ids.extend(page["id"].tolist())
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("sort, column, descending", [
+    ("Most Recent", "timestamp", True),
+    ("Alphabetical", "dish_name", False),
+])
+@pytest.mark.parametrize("page_size", [1, 4, 23, 50])
+def test_keyset_pages_cover_every_recipe_once(catalog, sort, column, descending, page_size):
+    expected = (
+        catalog.assign(_key=catalog[column].fillna(""))
+        .sort_values(["_key", "id"], ascending=not descending)["id"].tolist()
+    )
+    assert _pages(sort, page_size) == expected
+
+
+def test_keyset_pages_with_filters(catalog):
+    subset = catalog["id"].tolist()[::2]
+    assert sorted(_pages("Alphabetical", 3, recipe_ids=subset)) == sorted(subset)
+    assert _pages("Alphabetical", 3, search="zzznomatch") == []
+
+
+@pytest.mark.parametrize("sort, index", [
+    ("Most Recent", "idx_recipes_recent"),
+    ("Alphabetical", "idx_recipes_alpha"),
+])
+def test_cursor_seeks_into_the_sort_index(catalog, monkeypatch, sort, index):
+    queries = []
+    read_sql_query = utils.pd.read_sql_query
+
+    def recording(sql, conn, params=None):
+        queries.append((sql, params))
+        return read_sql_query(sql, conn, params=params)
+
+    _, cursor = utils.get_recipe_page(sort, 5)
+    monkeypatch.setattr(utils.pd, "read_sql_query", recording)
+    utils.get_recipe_page(sort, 5, cursor=cursor)
+    sql, params = queries[-1]
+    with connection() as conn:
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+    assert f"SEARCH r USING INDEX {index}" in plan
@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app_modules import db, write_queue
+from app_modules.db import connection
+
+
+def _insert(conn, body):
+    return conn.execute("INSERT INTO notes (body) VALUES (?)", (body,)).lastrowid
+
+
+def _fail(conn):
+    conn.execute("INSERT INTO notes (body) VALUES ('rolled back')")
+    raise ValueError("bad write")
+
+
+def _block(conn, started, release):
+    started.set()
+    release.wait(5)
+
+
+@pytest.fixture
+def notes():
+    with connection() as conn:
+        conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)")
+
+
+@pytest.fixture
+def blocked_writer():
+    """Park the writer thread inside a write so later submits queue up."""
+    started, release = threading.Event(), threading.Event()
+    blocker = write_queue.submit(_block, started, release)
+    assert started.wait(5)
+    yield release
+    release.set()
+    blocker.result(5)
+
+
+def _bodies():
+    with connection() as conn:
+        return [row[0] for row in conn.execute("SELECT body FROM notes ORDER BY id")]
+
+
+def test_failing_write_rejects_only_its_own_future(notes, blocked_writer):
+    futures = [
+        write_queue.submit(_insert, "first"),
+        write_queue.submit(_fail),
+        write_queue.submit(_insert, "second"),
+    ]
+    batches = write_queue.stats()["batches"]
+    blocked_writer.set()
+
+    assert futures[0].result(5) is not None
+    with pytest.raises(ValueError, match="bad write"):
+        futures[1].result(5)
+    assert futures[2].result(5) is not None
+    # All three went out in one commit
+    assert write_queue.stats()["batches"] == batches + 2
+    assert _bodies() == ["first", "second"]
+
+
+def test_full_queue_raises(notes, blocked_writer, monkeypatch):
+    monkeypatch.setattr(write_queue._queue, "maxsize", 1)
+    monkeypatch.setattr(write_queue, "SUBMIT_TIMEOUT", 0.01)
+    queued = write_queue.submit(_insert, "queued")
+    rejected = write_queue.stats()["rejected"]
+
+    with pytest.raises(write_queue.WriteQueueFull):
+        write_queue.submit(_insert, "dropped")
+
+    assert write_queue.stats()["rejected"] == rejected + 1
+    blocked_writer.set()
+    queued.result(5)
+    assert _bodies() == ["queued"]
+
+
+def test_lock_contention_fails_every_future(notes, monkeypatch):
+    monkeypatch.setattr(db, "BUSY_TIMEOUT_MS", 50)
+    db.close_all()
+    holder = sqlite3.connect(db.DB_FILE)
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        futures = [write_queue.submit(_insert, "first"), write_queue.submit(_insert, "second")]
+        for future in futures:
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                future.result(5)
+    finally:
+        holder.rollback()
+        holder.close()
+    assert write_queue.write(_insert, "after") is not None
+    assert _bodies() == ["after"]